@@ -2,6 +2,11 @@ verbose = None
 influxdb_bucket = None
 train_ts_file = None
 test_ts_files_list = []
+plots = None  # False to save render jobs instead of rendering plots
+plot_workers = None  # 0 to render plots in the main process
+plot_points = None  # max points of line plots (0 to plot all samples)
+plot_density_points = None  # samples above which expected VS predicted plots show density (0 to never show it)
+results_format = None  # "csv", "parquet" or "json"
 test_results_dir = None
 train_dir = None
 test_dir = None
@@ -10,10 +15,37 @@ img_dir = None
 log_file = None
 model_name = None
 x_vars = None
-prediction_method = None
+prediction_method = None  # method of the model being trained or tested
+prediction_methods = None
+cache_dir = None
+cache_mode = None  # "use", "refresh" or "bypass"
+cache_max_size = None  # MB
+data_source = None  # "influxdb" or "local"
+data_dir = None
+window = None  # Flux duration or "auto"
+row_budget = None
+influxdb_timeout = None  # seconds
+influxdb_pool_size = None
+fetch_backend = None  # "threads" or "async"
+fetch_concurrency = None
+coalesce_gap = None  # seconds (None to retrieve each period with its own query)
+coalesce_span = None  # seconds
+align_tolerance = None  # seconds
+search_mode = None  # "grid", "random" or "halving"
+search_budget = None  # fits
+search_time = None  # seconds (None for no time limit)
+search_jobs = None  # processes fitting search candidates (None to use all CPUs)
+merge_stats_files = None
+svr_components = None
+svr_sample_budget = None
 
 supported_vars = ["load", "user_load", "system_load", "wait_load", "freq", "sumfreq", "temp"]
-supported_pred_methods = ["polynomial", "freqwointeractionterms", "perceptron", "svr", "custom"]
+supported_pred_methods = ["polynomial", "freqwointeractionterms", "perceptron", "svr", "svrnystroem", "svrsketch",
+                          "svrsubsample", "custom"]
+supported_data_sources = ["influxdb", "local"]
+supported_fetch_backends = ["threads", "async"]
+supported_search_modes = ["grid", "random", "halving"]
+supported_results_formats = ["csv", "parquet", "json"]
 
 x_var_label = {
     "load": "Utilization (%)",
@@ -4,9 +4,33 @@ from cpu_power_seer.config import config
 
 def print_config():
     log(f"Model name: {config.model_name}")
-    log(f"Prediction method: {config.prediction_method}")
+    log(f"Prediction method: {', '.join(config.prediction_methods)}")
+    log(f"Data source: {config.data_source}" + (f" ({config.data_dir})" if config.data_source == "local" else ""))
     log(f"InfluxDB bucket name: {config.influxdb_bucket}")
+    log(f"Aggregation window: {config.window}" + (f" (row budget: {config.row_budget})" if config.window == "auto" else ""))
     log(f"Train data timestamps file: {config.train_ts_file}")
     log(f"Actual (test) data timestamps files list: {config.test_ts_files_list}")
+    log("Plots: " + ("saved to be rendered later" if not config.plots else "rendered in the main process"
+                     if config.plot_workers == 0 else f"rendered by {config.plot_workers or 'number of CPUs'} background workers"))
+    log(f"Line plots points: {config.plot_points or 'all samples'}")
+    log(f"Expected VS predicted density plots: " + (f"above {config.plot_density_points} samples"
+                                                      if config.plot_density_points else "never"))
+    if "perceptron" in config.prediction_methods:
+        log(f"Hyperparameter search: {config.search_mode} (budget: {config.search_budget} fits, "
+            f"time limit: {config.search_time} s)")
+    if {"svrnystroem", "svrsketch"} & set(config.prediction_methods):
+        log(f"SVR kernel approximation components: {config.svr_components}")
+    if "svrsubsample" in config.prediction_methods:
+        log(f"SVR sample budget: {config.svr_sample_budget}")
+    if config.merge_stats_files is not None:
+        log(f"Merged least squares statistics: {config.merge_stats_files}")
     log(f"Model variables: {config.x_vars}")
-    log(f"Output directory: {config.output_dir}")
+    log(f"Output directory: {config.output_dir} (results table format: {config.results_format})")
+    log(f"InfluxDB timeout: {config.influxdb_timeout} s (connection pool size: {config.influxdb_pool_size})")
+    log(f"Fetch backend: {config.fetch_backend} (concurrency: {config.fetch_concurrency or config.influxdb_pool_size})")
+    if config.coalesce_gap is not None:
+        log(f"Coalesce periods: gap <= {config.coalesce_gap} s, span <= {config.coalesce_span} s")
+    else:
+        log("Coalesce periods: no (one query per period)")
+    log(f"Alignment tolerance: {config.align_tolerance} s")
+    log(f"InfluxDB cache: {config.cache_dir} (mode: {config.cache_mode}, max size: {config.cache_max_size} MB)")
@@ -0,0 +1,14 @@
+import types
+
+from cpu_power_seer.config import config
+
+
+# Settings from config module, e.g. to initialize worker processes with the same configuration
+def get_config_state():
+    return {name: value for name, value in vars(config).items()
+            if not name.startswith("__") and not isinstance(value, types.ModuleType)}
+
+
+def set_config_state(state):
+    for name, value in state.items():
+        setattr(config, name, value)
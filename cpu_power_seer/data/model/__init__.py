@@ -1,5 +1,5 @@
 from .polynomial import PolynomialModel
 from .freq_wo_interaction_terms import FreqWoInteractionTerms
 from .perceptron import PerceptronModel
-from .support_vector_regression import SVRModel
+from .support_vector_regression import SVRModel, ApproximateSVRModel, SubsampledSVRModel
 from .custom import CustomModel
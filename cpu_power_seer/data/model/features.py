@@ -0,0 +1,75 @@
+import numpy as np
+
+
+# Expand X into n_columns features filled (vectorized) by fill(X, out)
+def expand_features(X, fill, n_columns):
+    X = np.asarray(X, dtype=np.float64)
+    features = np.empty((X.shape[0], n_columns))
+    fill(X, features)
+    return features
+
+
+# Same columns (and order) as PolynomialFeatures(degree=2): bias, x_i and x_i*x_j for i <= j
+class QuadraticFeatures:
+
+    def __init__(self):
+        self.n_features_in_ = None
+
+    @staticmethod
+    def fill(X, out):
+        n_features = X.shape[1]
+        rows, columns = np.triu_indices(n_features)
+        out[:, 0] = 1
+        out[:, 1:n_features + 1] = X
+        np.multiply(X[:, rows], X[:, columns], out=out[:, n_features + 1:])
+
+    def transform(self, X):
+        n_features = X.shape[1]
+        self.n_features_in_ = n_features
+        return expand_features(X, self.fill, 1 + n_features + n_features * (n_features + 1) // 2)
+
+    def fit_transform(self, X):
+        return self.transform(X)
+
+    # Exponents of each input feature in each output column (like PolynomialFeatures.powers_)
+    @staticmethod
+    def get_powers(n_features):
+        rows, columns = np.triu_indices(n_features)
+        powers = np.zeros((1 + n_features + len(rows), n_features), dtype=np.int64)
+        powers[1 + np.arange(n_features), np.arange(n_features)] = 1
+        np.add.at(powers, (n_features + 1 + np.arange(len(rows)), rows), 1)
+        np.add.at(powers, (n_features + 1 + np.arange(len(rows)), columns), 1)
+        return powers
+
+    def get_feature_names_out(self, names):
+        rows, columns = np.triu_indices(len(names))
+        return np.array(["1", *names] + [f"{names[i]}^2" if i == j else f"{names[i]} {names[j]}"
+                                         for i, j in zip(rows, columns)], dtype=object)
+
+
+# user, system, user*system, user², system² and custom frequency (freq*(user+system) or sumfreq)
+# from [user_load, system_load, freq || sumfreq] columns
+def freq_wo_interaction_terms_features(X, freq_var):
+    def fill(X, out):
+        user, system, frequency = X[:, 0], X[:, 1], X[:, 2]
+        out[:, 0] = user
+        out[:, 1] = system
+        np.multiply(user, system, out=out[:, 2])
+        np.square(user, out=out[:, 3])
+        np.square(system, out=out[:, 4])
+        if freq_var == "custom_freq":
+            np.add(user, system, out=out[:, 5])
+            out[:, 5] *= frequency
+        else:
+            out[:, 5] = frequency
+    return expand_features(X, fill, 6)
+
+
+# Transformer version of freq_wo_interaction_terms_features (e.g. to be stored with the model)
+class FreqWoInteractionTermsFeatures:
+
+    def __init__(self, freq_var):
+        self.freq_var = freq_var
+
+    def transform(self, X):
+        return freq_wo_interaction_terms_features(X, self.freq_var)
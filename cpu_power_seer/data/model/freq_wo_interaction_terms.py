@@ -1,7 +1,7 @@
-from sklearn.model_selection import train_test_split
 import numpy as np
 
 from cpu_power_seer.data.model.polynomial import PolynomialModel, generate_monomials
+from cpu_power_seer.data.model.features import freq_wo_interaction_terms_features, FreqWoInteractionTermsFeatures
 from cpu_power_seer.config import config
 
 
@@ -13,40 +13,25 @@ class FreqWoInteractionTerms(PolynomialModel):
         elif "sumfreq" in config.x_vars:
             self.freq_var = "sumfreq"
 
-    def get_custom_freq(self, frequency, user, system):
+    def transform_features(self, X):
+        return freq_wo_interaction_terms_features(X, self.freq_var)
+
+    def get_preprocessing(self):
+        return [FreqWoInteractionTermsFeatures(self.freq_var)]
+
+    def get_feature_names(self):
+        return ["user_load", "system_load", "user_load system_load", "user_load^2", "system_load^2", self.freq_var]
+
+    # Features are computed from [user_load, system_load, freq || sumfreq] columns (see
+    # freq_wo_interaction_terms_features), custom frequency expands to freq*user + freq*system
+    def get_feature_monomials(self):
+        user, system, frequency = np.eye(len(config.x_vars), dtype=np.int64)[:3]
+        monomials = [[(user, 1)], [(system, 1)], [(user + system, 1)], [(2 * user, 1)], [(2 * system, 1)]]
         if self.freq_var == "custom_freq":
-            return frequency * (user + system)
-        elif self.freq_var == "sumfreq":
-            return frequency
-
-    def set_train_and_test_data(self, X, y):
-            user = X[:, 0]
-            system = X[:, 1]
-            frequency = X[:, 2]
-            user_system = user * system
-            user_squared = user ** 2
-            system_squared = system ** 2
-            custom_freq = self.get_custom_freq(frequency, user, system)
-            X_custom = np.column_stack([user, system, user_system,
-                                        user_squared, system_squared, custom_freq])
-            X_train, X_test, y_train, y_test = train_test_split(X_custom, y, test_size=0.2, random_state=42)
-            self.X_train = X_train
-            self.y_train = y_train
-            self.X_test = X_test
-            self.y_test = y_test
-
-    def set_actual_values(self, X, y):
-        if X is not None and y is not None:
-            user = X[:, 0]
-            system = X[:, 1]
-            frequency = X[:, 2]
-            user_system = user * system
-            user_squared = user ** 2
-            system_squared = system ** 2
-            custom_freq = self.get_custom_freq(frequency, user, system)
-            self.X_actual = np.column_stack([user, system, user_system,
-                                             user_squared, system_squared, custom_freq])
-            self.y_actual = y
+            monomials.append([(frequency + user, 1), (frequency + system, 1)])
+        else:
+            monomials.append([(frequency, 1)])
+        return monomials
 
     def set_equation(self, idle_consumption):
         names_list = [config.x_var_eq[var] for var in config.x_vars if var != 'freq' and var != 'sumfreq']
@@ -0,0 +1,130 @@
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+
+CHUNK_SIZE = 10000
+
+
+# Sufficient statistics of a least squares problem: number of samples, means of X and y and the Gram
+# matrices of the centered data (XᵀX and Xᵀy after removing the means). Statistics from different chunks
+# (or from different campaigns/nodes) are merged with the pairwise update of Chan et al., so they never
+# need the raw samples again and their size only depends on the number of features
+class LeastSquaresStats:
+
+    def __init__(self, n_features, n_targets=1, features=None):
+        self.n = 0
+        self.x_mean = np.zeros(n_features)
+        self.y_mean = np.zeros(n_targets)
+        self.xx = np.zeros((n_features, n_features))
+        self.xy = np.zeros((n_features, n_targets))
+        self.features = list(features) if features is not None else None
+
+    def update(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64).reshape(len(X), -1)
+        if len(X) == 0:
+            return self
+        chunk = LeastSquaresStats(X.shape[1], y.shape[1])
+        chunk.n = len(X)
+        chunk.x_mean = X.mean(axis=0)
+        chunk.y_mean = y.mean(axis=0)
+        X_centered = X - chunk.x_mean
+        chunk.xx = X_centered.T @ X_centered
+        chunk.xy = X_centered.T @ (y - chunk.y_mean)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        if self.features is not None and other.features is not None and self.features != other.features:
+            raise ValueError(f"Statistics with different features can't be merged: {self.features} != {other.features}")
+        if self.xx.shape != other.xx.shape or self.xy.shape != other.xy.shape:
+            raise ValueError(f"Statistics with different shapes can't be merged: {self.xy.shape} != {other.xy.shape}")
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        x_delta = other.x_mean - self.x_mean
+        y_delta = other.y_mean - self.y_mean
+        factor = self.n * other.n / n
+        self.xx = self.xx + other.xx + factor * np.outer(x_delta, x_delta)
+        self.xy = self.xy + other.xy + factor * np.outer(x_delta, y_delta)
+        self.x_mean = self.x_mean + x_delta * other.n / n
+        self.y_mean = self.y_mean + y_delta * other.n / n
+        self.n = n
+        return self
+
+    # Coefficients (n_targets x n_features) and intercepts (n_targets). Constant features (e.g. the bias
+    # column of PolynomialFeatures) get a zero coefficient, like in LinearRegression. The Gram matrix is
+    # scaled to unit diagonal and solved by Cholesky (A = LLᵀ, then solving L z = B and Lᵀ x = z), or by lstsq
+    # if it isn't positive definite
+    def solve(self):
+        diag = np.diag(self.xx)
+        active = diag > np.finfo(np.float64).eps * self.n * np.maximum(self.x_mean ** 2, np.finfo(np.float64).tiny)
+        coef = np.zeros(self.xy.shape)
+        if active.any():
+            scale = 1 / np.sqrt(diag[active])
+            A = self.xx[np.ix_(active, active)] * np.outer(scale, scale)
+            B = self.xy[active] * scale[:, None]
+            try:
+                L = np.linalg.cholesky(A)
+                solution = np.linalg.solve(L.T, np.linalg.solve(L, B))
+            except np.linalg.LinAlgError:
+                solution = np.linalg.lstsq(A, B, rcond=None)[0]
+            coef[active] = solution * scale[:, None]
+        intercept = self.y_mean - self.x_mean @ coef
+        return coef.T, intercept
+
+    def save(self, path):
+        np.savez(path, n=self.n, x_mean=self.x_mean, y_mean=self.y_mean, xx=self.xx, xy=self.xy,
+                 features=np.array(self.features if self.features is not None else [], dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            features = [str(feature) for feature in data["features"]] if len(data["features"]) > 0 else None
+            stats = cls(len(data["x_mean"]), len(data["y_mean"]), features)
+            stats.n = int(data["n"])
+            stats.x_mean = data["x_mean"]
+            stats.y_mean = data["y_mean"]
+            stats.xx = data["xx"]
+            stats.xy = data["xy"]
+        return stats
+
+
+# Linear regression solved from LeastSquaresStats. Samples are added chunk by chunk (fit/partial_fit) and
+# statistics from other trainings can be merged before solving. Same coef_/intercept_ layout as LinearRegression
+class IncrementalLinearRegression(RegressorMixin, BaseEstimator):
+
+    def __init__(self, features=None, chunk_size=CHUNK_SIZE):
+        self.features = features
+        self.chunk_size = chunk_size
+
+    def update(self, X, y):
+        y = np.asarray(y)
+        if not hasattr(self, "stats_"):
+            n_targets = y.shape[1] if y.ndim > 1 else 1
+            self.stats_ = LeastSquaresStats(X.shape[1], n_targets, self.features)
+            self.multi_output_ = y.ndim > 1
+        for start in range(0, len(X), self.chunk_size):
+            self.stats_.update(X[start:start + self.chunk_size], y[start:start + self.chunk_size])
+
+    def set_coefficients(self):
+        self.coef_, self.intercept_ = self.stats_.solve()
+        if not self.multi_output_:
+            self.coef_, self.intercept_ = self.coef_[0], self.intercept_[0]
+        self.n_features_in_ = self.stats_.xx.shape[0]
+
+    def fit(self, X, y):
+        if hasattr(self, "stats_"):
+            del self.stats_
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        self.update(X, y)
+        self.set_coefficients()
+        return self
+
+    def merge(self, stats):
+        self.stats_.merge(stats)
+        self.set_coefficients()
+        return self
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_.T + self.intercept_
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from cpu_power_seer.config import config
+from cpu_power_seer.logs.logger import log
+
+METRICS = ["MAX ERROR", "MAE", "MAPE", "RMSE", "NRMSE", "R2 SCORE", "R2 ADJUSTED"]
+
+# Minimum expected value used as MAPE denominator (same as sklearn mean_absolute_percentage_error)
+MAPE_EPSILON = np.finfo(np.float64).eps
+
+
+def get_samples(expected, predicted):
+    expected = np.asarray(expected, dtype=np.float64).ravel()
+    predicted = np.asarray(predicted, dtype=np.float64).ravel()
+    if len(expected) != len(predicted):
+        log(f"Number of real samples ({len(expected)}) doesn't match number of predicted values ({len(predicted)})",
+            "ERR")
+        exit(1)
+    return expected, predicted
+
+
+# Metrics of consecutive groups of samples (e.g. tests and threads), one row per group. Sums and extremes
+# of all groups are computed at once with reduceat over a single array of errors, so samples are only
+# validated and scanned once. Metrics of empty groups are NaN. Edge cases follow sklearn metrics: R2 of
+# constant expected values is 1 if predictions are perfect and 0 otherwise (NaN with a single sample),
+# and adjusted R2 is 0 when there aren't more samples than vars + 1
+def get_grouped_metrics(expected, predicted, sizes, n_vars=None):
+    expected, predicted = get_samples(expected, predicted)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    if sizes.sum() != len(expected):
+        log(f"Groups size ({sizes.sum()}) doesn't match number of samples ({len(expected)})", "ERR")
+        exit(1)
+    n_vars = n_vars if n_vars is not None else len(config.x_vars)
+    table = pd.DataFrame(np.nan, index=range(len(sizes)), columns=METRICS)
+    nonempty = sizes > 0
+    if not nonempty.any():
+        return table
+
+    n = sizes[nonempty]
+    starts = (np.cumsum(sizes) - sizes)[nonempty]
+    error = predicted - expected
+    abs_error = np.abs(error)
+    ss_res = np.add.reduceat(error * error, starts)
+    mean = np.add.reduceat(expected, starts) / n
+    deviation = expected - np.repeat(mean, n)
+    ss_tot = np.add.reduceat(deviation * deviation, starts)
+    rmse = np.sqrt(ss_res / n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.where(ss_tot != 0, 1 - ss_res / ss_tot, np.where(ss_res == 0, 1.0, 0.0))
+        r2 = np.where(n > 1, r2, np.nan)
+        nrmse = rmse / (np.maximum.reduceat(expected, starts) - np.minimum.reduceat(expected, starts))
+    dof = n - 1 - n_vars
+    r2_adj = np.where(dof > 0, 1 - (n - 1) / np.maximum(dof, 1) * (1 - r2), 0.0)
+
+    table.loc[nonempty, "MAX ERROR"] = np.maximum.reduceat(abs_error, starts)
+    table.loc[nonempty, "MAE"] = np.add.reduceat(abs_error, starts) / n
+    table.loc[nonempty, "MAPE"] = np.add.reduceat(abs_error / np.maximum(np.abs(expected), MAPE_EPSILON), starts) / n
+    table.loc[nonempty, "RMSE"] = rmse
+    table.loc[nonempty, "NRMSE"] = nrmse
+    table.loc[nonempty, "R2 SCORE"] = r2
+    table.loc[nonempty, "R2 ADJUSTED"] = r2_adj
+    return table
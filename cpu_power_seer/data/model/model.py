@@ -1,4 +1,10 @@
+from datetime import datetime, timezone
 from joblib import dump
+import numpy as np
+import sklearn
+
+from cpu_power_seer.config import config
+from cpu_power_seer.inference.pipeline_model import PipelineModel
 
 
 class Model:
@@ -16,6 +22,7 @@ class Model:
         self.y_pred_actual = None
         self.model = None
         self.equation = None
+        self.train_time = None
 
     def set_equation(self, idle_consumption):
         self.equation = None
@@ -34,5 +41,22 @@ class Model:
         if self.X_actual is not None:
             self.predict_actual_values()
 
+    # Transformers applied to raw vars before predicting with self.model
+    def get_preprocessing(self):
+        return []
+
+    def get_metadata(self):
+        return {
+            "model_name": self.name,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "train_samples": len(self.X_train),
+            "equation": self.equation,
+            "numpy_version": np.__version__,
+            "sklearn_version": sklearn.__version__
+        }
+
+    # Complete model (preprocessing, estimator, vars and metadata) loadable with inference.load_model.
+    # It is stored uncompressed so its arrays can be memory-mapped when loading
     def save_model(self, path):
-        dump(self.model, path)
+        dump(PipelineModel(config.x_vars, self.get_preprocessing(), self.model, config.prediction_method,
+                           self.get_metadata()), path)
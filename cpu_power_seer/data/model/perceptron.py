@@ -1,10 +1,10 @@
 from sklearn.model_selection import train_test_split
 from sklearn.neural_network import MLPRegressor
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import GridSearchCV
 import pandas as pd
 
 from cpu_power_seer.data.model.model import Model
+from cpu_power_seer.data.model.search import get_cv_splits, create_search, run_search
 from cpu_power_seer.logs.logger import log
 
 
@@ -24,6 +24,7 @@ class PerceptronModel(Model):
     def __init__(self, name):
         super().__init__(name)
         self.scaler = None
+        self.cv_splits = None
         self.grid_search = None
 
     def set_train_and_test_data(self, X, y):
@@ -34,21 +35,23 @@ class PerceptronModel(Model):
         self.y_train = y_train
         self.X_test = self.scaler.transform(X_test)
         self.y_test = y_test
+        self.cv_splits = get_cv_splits(self.X_train)
 
     def set_actual_values(self, X, y):
         if X is not None and y is not None:
             self.X_actual = self.scaler.transform(X)
             self.y_actual = y
 
+    def get_preprocessing(self):
+        return [self.scaler]
+
     def set_model(self):
         mlp = MLPRegressor(verbose=True, random_state=1, n_iter_no_change=20, tol=1e-5)
-        self.grid_search = GridSearchCV(mlp, param_grid,
-                                        scoring='neg_mean_absolute_percentage_error', cv=5, n_jobs=-1, verbose=2)
+        self.grid_search = create_search(mlp, param_grid, self.cv_splits, 'neg_mean_absolute_percentage_error')
 
     def train(self):
         log("Searching for the best configuration by cross-validation")
-        self.grid_search.fit(self.X_train, self.y_train.ravel())
-        log(f"Found best model parameters {self.grid_search.best_params_} (Mean score: {-self.grid_search.best_score_})")
-        self.model = self.grid_search.best_estimator_
+        self.model, best_params, best_score = run_search(self.grid_search, self.X_train, self.y_train.ravel())
+        log(f"Found best model parameters {best_params} (Mean score: {-best_score})")
         cv_results = pd.DataFrame(self.grid_search.cv_results_)
         log(cv_results)
@@ -1,24 +1,33 @@
+import os
+import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
 
 from cpu_power_seer.config import config
 from cpu_power_seer.data.model.utils import generate_monomials
 from cpu_power_seer.data.model.model import Model
+from cpu_power_seer.data.model.features import QuadraticFeatures
+from cpu_power_seer.data.model.least_squares import IncrementalLinearRegression, LeastSquaresStats
+from cpu_power_seer.inference.linear_model import LinearPowerModel
+from cpu_power_seer.logs.logger import log
 
 
 class PolynomialModel(Model):
+    # Only test features are expanded here. Train samples are kept raw and expanded chunk by chunk while
+    # training, so the expanded train design matrix is never assembled
     def set_train_and_test_data(self, X, y):
+        self.poly_features = QuadraticFeatures()
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        self.poly_features = PolynomialFeatures(degree=2)
-        self.X_train = self.poly_features.fit_transform(X_train)
+        self.X_train = X_train
         self.y_train = y_train
-        self.X_test = self.poly_features.transform(X_test)
+        self.X_test = self.transform_features(X_test)
         self.y_test = y_test
 
+    def transform_features(self, X):
+        return self.poly_features.transform(X)
+
     def set_actual_values(self, X, y):
         if X is not None and y is not None:
-            self.X_actual = self.poly_features.transform(X)
+            self.X_actual = self.transform_features(X)
             self.y_actual = y
 
     def set_equation(self, idle_consumption):
@@ -33,5 +42,54 @@ class PolynomialModel(Model):
         ]
         self.equation = "".join(eq_lines)
 
+    def get_preprocessing(self):
+        return [self.poly_features]
+
+    def get_feature_names(self):
+        return list(self.poly_features.get_feature_names_out(config.x_vars))
+
     def set_model(self):
-        self.model = LinearRegression()
+        self.model = IncrementalLinearRegression(features=self.get_feature_names())
+
+    # Least squares statistics are updated with the features of each chunk of train samples. Statistics from
+    # other trainings (e.g. other campaigns or nodes) are merged before solving. Train samples are still held
+    # in memory (they are split from the whole train time series), so memory isn't constant in the length of
+    # the training campaign: merging statistics of separate trainings is the way to bound it
+    def train(self):
+        chunk_size = self.model.chunk_size
+        for start in range(0, len(self.X_train), chunk_size):
+            self.model.update(self.transform_features(self.X_train[start:start + chunk_size]),
+                              self.y_train[start:start + chunk_size])
+        self.model.set_coefficients()
+        for file in config.merge_stats_files or []:
+            log(f"Merging least squares statistics from {file}")
+            try:
+                self.model.merge(LeastSquaresStats.load(file))
+            except ValueError as e:
+                log(f"Statistics from {file} can't be merged with this model: {e}", "ERR")
+                exit(1)
+
+    # Monomials of each feature as (exponents over config.x_vars, factor) pairs
+    def get_feature_monomials(self):
+        return [[(exponents, 1)] for exponents in self.poly_features.get_powers(len(config.x_vars))]
+
+    # Coefficient-only model that predicts power from raw vars without scikit-learn
+    def get_linear_model(self):
+        exponents = []
+        coefficients = []
+        intercept = float(np.ravel(self.model.intercept_)[0])
+        for monomials, coef in zip(self.get_feature_monomials(), np.ravel(self.model.coef_)):
+            for monomial_exponents, factor in monomials:
+                if not np.any(monomial_exponents):
+                    intercept += factor * coef
+                else:
+                    exponents.append(monomial_exponents)
+                    coefficients.append(factor * coef)
+        return LinearPowerModel(config.x_vars, exponents, coefficients, intercept, config.prediction_method)
+
+    # Least squares statistics are saved next to the model to be merged by other trainings, as well as
+    # the coefficient-only model (<method>.json) to predict without scikit-learn
+    def save_model(self, path):
+        super().save_model(path)
+        self.model.stats_.save(f"{os.path.splitext(path)[0]}-stats.npz")
+        self.get_linear_model().save(f"{os.path.splitext(path)[0]}.json")
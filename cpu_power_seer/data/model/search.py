@@ -0,0 +1,118 @@
+import time
+import warnings
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.exceptions import FitFailedWarning
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, HalvingRandomSearchCV, KFold
+
+from cpu_power_seer.config import config
+from cpu_power_seer.logs.logger import log
+
+CV_FOLDS = 5
+HALVING_FACTOR = 3
+ESTIMATOR_PREFIX = "estimator__"
+
+
+# Wrap an estimator to skip its fits once the search deadline (epoch seconds) has passed. Deadline is
+# absolute, so it is also honored by fits running in other processes. Skipped fits predict NaN, so
+# their scoring fails and they get no score (as failed fits, but the search goes on)
+class DeadlineEstimator(RegressorMixin, BaseEstimator):
+
+    def __init__(self, estimator, deadline=None):
+        self.estimator = estimator
+        self.deadline = deadline
+
+    def fit(self, X, y):
+        if self.deadline is not None and time.time() > self.deadline:
+            self.estimator_ = None
+            return self
+        self.estimator_ = clone(self.estimator).fit(X, y)
+        return self
+
+    def predict(self, X):
+        if self.estimator_ is None:
+            return np.full(len(X), np.nan)
+        return self.estimator_.predict(X)
+
+
+# Processes fitting search candidates. Searches of models trained in parallel share the CPUs
+def get_search_jobs():
+    return config.search_jobs if config.search_jobs is not None else -1
+
+
+# Folds are computed once and reused by every candidate (and every halving iteration)
+def get_cv_splits(X, n_splits=CV_FOLDS):
+    return list(KFold(n_splits=n_splits).split(X))
+
+
+# Number of halving candidates whose total number of fits (~ candidates * folds * factor / (factor - 1)) fits the budget
+def get_halving_candidates(budget, n_splits):
+    return max(HALVING_FACTOR, budget * (HALVING_FACTOR - 1) // (HALVING_FACTOR * n_splits))
+
+
+# Hyperparameter search following config.search_mode:
+#   grid: every configuration from param_grid
+#   random: budget / folds configurations sampled from param_grid
+#   halving: successive halving over configurations sampled from param_grid. All candidates are first
+#            evaluated on a small subsample and only the best 1/HALVING_FACTOR go on with more samples
+# Fits are skipped when the time budget (config.search_time) is exceeded. Best model is refitted afterwards
+def create_search(estimator, param_grid, cv_splits, scoring):
+    wrapper = DeadlineEstimator(estimator)
+    param_grid = {f"{ESTIMATOR_PREFIX}{name}": values for name, values in param_grid.items()}
+    if config.search_mode == "random":
+        return RandomizedSearchCV(wrapper, param_grid, n_iter=max(1, config.search_budget // len(cv_splits)),
+                                  scoring=scoring, cv=cv_splits, n_jobs=get_search_jobs(), verbose=2, refit=False, random_state=1)
+    if config.search_mode == "halving":
+        return HalvingRandomSearchCV(wrapper, param_grid,
+                                     n_candidates=get_halving_candidates(config.search_budget, len(cv_splits)),
+                                     factor=HALVING_FACTOR, resource="n_samples", min_resources="exhaust",
+                                     scoring=scoring, cv=cv_splits, n_jobs=get_search_jobs(), verbose=2, refit=False, random_state=1)
+    return GridSearchCV(wrapper, param_grid, scoring=scoring, cv=cv_splits, n_jobs=get_search_jobs(), verbose=2, refit=False)
+
+
+def get_params(params):
+    return {name.removeprefix(ESTIMATOR_PREFIX): value for name, value in params.items()}
+
+
+# Index of the best candidate. In halving search only candidates from the last iteration with scores
+# are compared (they have been evaluated with more samples)
+def get_best_index(results):
+    scores = np.asarray(results["mean_test_score"], dtype=np.float64)
+    candidates = np.flatnonzero(~np.isnan(scores))
+    if len(candidates) == 0:
+        return None
+    if "iter" in results:
+        iterations = np.asarray(results["iter"])
+        candidates = candidates[iterations[candidates] == iterations[candidates].max()]
+    return candidates[np.argmax(scores[candidates])]
+
+
+# Run search and return best estimator (refitted with all samples), its parameters and mean score
+def run_search(search, X, y):
+    start = time.time()
+    if config.search_time is not None:
+        search.estimator.set_params(deadline=start + config.search_time)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FitFailedWarning)
+        warnings.filterwarnings("ignore", message="One or more of the .* scores are non-finite")
+        warnings.filterwarnings("ignore", message="Scoring failed")
+        search.fit(X, y)
+    results = search.cv_results_
+    scores = np.asarray(results["mean_test_score"], dtype=np.float64)
+    # Halving search has one row per candidate and iteration, so configurations are counted once
+    configurations = [str(params) for params in results["params"]]
+    evaluated = {configuration for configuration, score in zip(configurations, scores) if not np.isnan(score)}
+    log(f"Evaluated {len(evaluated)} of {len(set(configurations))} configurations ({len(scores)} candidate "
+        f"evaluations) in {time.time() - start:.1f} s ({config.search_mode} search)")
+    if np.isnan(scores).any():
+        log(f"{np.count_nonzero(np.isnan(scores))} candidate evaluations have no score (failed fits or skipped by "
+            f"search time budget)", "WARN")
+
+    best_index = get_best_index(results)
+    if best_index is None:
+        log("No configuration could be evaluated. Try increasing search time budget", "ERR")
+        exit(1)
+    best_params = get_params(results["params"][best_index])
+    model = clone(search.estimator.estimator).set_params(**best_params).fit(X, y)
+    return model, best_params, scores[best_index]
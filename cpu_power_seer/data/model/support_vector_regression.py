@@ -1,8 +1,22 @@
+import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.svm import SVR
+from sklearn.svm import SVR, LinearSVR
+from sklearn.kernel_approximation import Nystroem, PolynomialCountSketch
+from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import StandardScaler
 
+from cpu_power_seer.config import config
 from cpu_power_seer.data.model.model import Model
+from cpu_power_seer.logs.logger import log
+
+# Kernel and loss of SVR (also approximated by scalable variants)
+SVR_DEGREE = 2
+SVR_COEF0 = 0.0
+SVR_EPSILON = 0.1
+SVR_C = 1.0
+
+# Power bins used to stratify subsampling
+SUBSAMPLE_BINS = 10
 
 
 class SVRModel(Model):
@@ -24,5 +38,47 @@ class SVRModel(Model):
             self.X_actual = self.scaler.transform(X)
             self.y_actual = y
 
+    def get_preprocessing(self):
+        return [self.scaler]
+
+    def set_model(self):
+        self.model = SVR(kernel="poly", degree=SVR_DEGREE, coef0=SVR_COEF0, epsilon=SVR_EPSILON, C=SVR_C)
+
+
+# SVR whose polynomial kernel is approximated by an explicit feature map (Nystroem or polynomial count
+# sketch) followed by a linear SVR. Training time is linear in the number of samples
+class ApproximateSVRModel(SVRModel):
+
+    def __init__(self, name, feature_map):
+        super().__init__(name)
+        self.feature_map = feature_map
+
+    # Same as SVR gamma="scale"
+    def get_gamma(self):
+        variance = self.X_train.var()
+        return 1.0 / (self.X_train.shape[1] * variance) if variance != 0 else 1.0
+
     def set_model(self):
-        self.model = SVR(kernel="poly", degree=2)
+        if self.feature_map == "nystroem":
+            feature_map = Nystroem(kernel="poly", degree=SVR_DEGREE, gamma=self.get_gamma(), coef0=SVR_COEF0,
+                                   n_components=min(config.svr_components, len(self.X_train)), random_state=1)
+        else:
+            feature_map = PolynomialCountSketch(degree=SVR_DEGREE, gamma=self.get_gamma(), coef0=SVR_COEF0,
+                                                n_components=config.svr_components, random_state=1)
+        self.model = make_pipeline(feature_map, LinearSVR(epsilon=SVR_EPSILON, C=SVR_C, loss="epsilon_insensitive",
+                                                          dual=True, max_iter=10000, random_state=1))
+
+
+# Exact SVR trained with a stratified (by power) subsample of train data of at most config.svr_sample_budget samples
+class SubsampledSVRModel(SVRModel):
+
+    def set_train_and_test_data(self, X, y):
+        super().set_train_and_test_data(X, y)
+        if len(self.X_train) > config.svr_sample_budget:
+            y_train = np.ravel(self.y_train)
+            edges = np.quantile(y_train, np.linspace(0, 1, SUBSAMPLE_BINS + 1)[1:-1])
+            bins = np.digitize(y_train, edges)
+            self.X_train, _, self.y_train, _ = train_test_split(self.X_train, self.y_train,
+                                                                train_size=config.svr_sample_budget,
+                                                                stratify=bins, random_state=42)
+            log(f"SVR will be trained with {len(self.X_train)} of {len(y_train)} train samples")
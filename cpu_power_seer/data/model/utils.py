@@ -1,23 +1,7 @@
-from sklearn.metrics import mean_squared_error, r2_score, max_error, mean_absolute_error, mean_absolute_percentage_error
-import numpy as np
-
 from cpu_power_seer.config import config
 from cpu_power_seer.logs.logger import log
 
 
-def r2_adj_score(expected, predicted, r2=None):
-    n = len(expected)
-    k = len(config.x_vars)
-    if n != len(predicted):
-        log(f"Number of real samples ({n}) doesn't match number of predicted values ({len(predicted)})", "ERR")
-        exit(1)
-    if r2 is None:
-        r2 = r2_score(expected, predicted)
-    if (n - 1 - k) <= 0:  # Avoid division by zero or R2adj > 1 [Extreme case k >= n-1]
-        return 0
-    return 1 - ((n - 1)/(n - 1 - k)) * (1 - r2)
-
-
 def generate_monomials(X):
     monomials = X.copy()
     for i in range(len(X)):
@@ -33,27 +17,39 @@ def write_value(value_name, value, test_name):
         file.write(f"{test_name} {value_name}: {value}\n")
 
 
-def write_performance(model_name, expected, predicted, write_summary=False, test_name=None, equation=None):
+def write_results(model_name, performance, equation=None):
     results_file = f'{config.test_results_dir}/{config.model_name}-results.out'
-    max_err = max_error(expected, predicted)
-    mae = mean_absolute_error(expected, predicted)
-    mape = mean_absolute_percentage_error(expected, predicted)
-    norm_factor = np.max(expected) - np.min(expected)
-    rmse = mean_squared_error(expected, predicted, squared=False)
-    r2 = r2_score(expected, predicted)
-    r2_adj = r2_adj_score(expected, predicted, r2)
     with open(results_file, 'w') as file:
         file.write(f"MODEL NAME: {model_name}\n")
-        file.write(f"MAX ERROR: {max_err}\n")
-        file.write(f"MAE: {mae}\n")
-        file.write(f"MAPE: {mape}\n")
-        file.write(f"RMSE: {rmse}\n")
-        file.write(f"NRMSE: {rmse/norm_factor}\n")
-        file.write(f"R2 SCORE: {r2}\n")
-        file.write(f"R2 ADJUSTED: {r2_adj}\n")
+        file.write(f"MAX ERROR: {performance['MAX ERROR']}\n")
+        file.write(f"MAE: {performance['MAE']}\n")
+        file.write(f"MAPE: {performance['MAPE']}\n")
+        file.write(f"RMSE: {performance['RMSE']}\n")
+        file.write(f"NRMSE: {performance['NRMSE']}\n")
+        file.write(f"R2 SCORE: {performance['R2 SCORE']}\n")
+        file.write(f"R2 ADJUSTED: {performance['R2 ADJUSTED']}\n")
         if equation is not None:
             file.write(f"{equation}")
         file.write("\n")
-    if write_summary:
-        write_value("R2", r2, test_name)
-        write_value("MAPE", mape, test_name)
+
+
+# Store a results table (one row per method, test and threads) as <path>.<config.results_format>
+def write_results_table(table, path):
+    results_file = f"{path}.{config.results_format}"
+    if config.results_format == "parquet":
+        table.to_parquet(results_file, index=False)
+    elif config.results_format == "json":
+        table.to_json(results_file, orient="records", indent=1)
+    else:
+        table.to_csv(results_file, index=False)
+    log(f"Results table stored at {results_file}")
+
+
+# Table comparing performance of models trained in the same run (one row per model and test, from the
+# results table rows with all threads)
+def write_comparison(results):
+    table = results[results["THREADS"] == 0].drop(columns=["THREADS", "SAMPLES"]).to_string(index=False)
+    comparison_file = f'{config.output_dir}/{config.model_name}-comparison.out'
+    with open(comparison_file, 'w') as file:
+        file.write(f"{table}\n")
+    log(f"Models comparison stored at {comparison_file}\n{table}")
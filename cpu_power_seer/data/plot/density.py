@@ -0,0 +1,40 @@
+import numpy as np
+
+# Bins of each axis of density plots
+DENSITY_BINS = 100
+# Bins of x whose quantiles of y are computed and minimum number of samples of a bin to compute them
+QUANTILE_BINS = 50
+MIN_QUANTILE_SAMPLES = 10
+
+
+# Number of (x, y) samples in each cell of a (bins x bins) grid covering both ranges (same range in both
+# axes). Returns counts (x bins, y bins) and cell edges
+def get_density(x, y, bins=DENSITY_BINS):
+    x, y = np.ravel(x), np.ravel(y)
+    low, high = min(x.min(), y.min()), max(x.max(), y.max())
+    edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+    counts, _, _ = np.histogram2d(x, y, bins=[edges, edges])
+    return counts, edges
+
+
+# Quantiles of y (linear interpolation, like np.quantile) of samples in each of the equal width bins of x.
+# Samples are sorted by bin and y at once and the quantiles of all bins are interpolated from the start and
+# size of each bin. Returns bin centers and quantiles (quantiles x bins), NaN for bins with less than
+# min_samples samples
+def get_binned_quantiles(x, y, quantiles, bins=QUANTILE_BINS, min_samples=MIN_QUANTILE_SAMPLES):
+    x, y = np.ravel(x).astype(np.float64), np.ravel(y).astype(np.float64)
+    low, high = x.min(), x.max()
+    width = (high - low) / bins if high > low else 1
+    bin_idx = np.clip(((x - low) / width).astype(np.int64), 0, bins - 1)
+    y_sorted = y[np.lexsort((y, bin_idx))]
+    counts = np.bincount(bin_idx, minlength=bins)
+    starts = np.cumsum(counts) - counts
+
+    positions = starts + np.outer(quantiles, np.maximum(counts - 1, 0))
+    below = np.floor(positions).astype(np.int64)
+    above = np.minimum(below + 1, np.maximum(starts + counts - 1, 0))
+    below = np.minimum(below, len(y_sorted) - 1)
+    above = np.minimum(above, len(y_sorted) - 1)
+    values = y_sorted[below] + (positions - below) * (y_sorted[above] - y_sorted[below])
+    values[:, counts < max(min_samples, 1)] = np.nan
+    return low + (np.arange(bins) + 0.5) * width, values
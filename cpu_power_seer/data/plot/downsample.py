@@ -0,0 +1,29 @@
+import numpy as np
+
+# First and last samples and the minimum and maximum of at least one bucket
+MIN_POINTS = 4
+
+
+# Positions of the samples of y kept to plot it with at most max_points points: the first and last samples and
+# the minimum and maximum of each bucket of consecutive samples (in order), so peaks are kept. All buckets are
+# reduced at once from a (buckets, bucket size) view of y padded with NaN. Missing values are never selected
+# unless a whole bucket is missing
+def get_minmax_indices(y, max_points):
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_points <= 0 or n <= max_points:
+        return np.arange(n)
+
+    bucket_size = -(-n // (max(max_points, MIN_POINTS) // 2 - 1))
+    n_buckets = -(-n // bucket_size)
+    buckets = np.full(n_buckets * bucket_size, np.nan)
+    buckets[:n] = y
+    buckets = buckets.reshape(n_buckets, bucket_size)
+    missing = np.isnan(buckets)
+    first = np.arange(n_buckets) * bucket_size
+    min_idx = np.where(missing, np.inf, buckets).argmin(axis=1) + first
+    max_idx = np.where(missing, -np.inf, buckets).argmax(axis=1) + first
+
+    indices = np.sort(np.stack([min_idx, max_idx], axis=1), axis=1).ravel()
+    indices = np.concatenate(([0], indices[indices < n], [n - 1]))
+    return indices[np.concatenate(([True], np.diff(indices) > 0))]
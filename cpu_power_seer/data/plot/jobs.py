@@ -0,0 +1,122 @@
+import os
+import glob
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+
+from cpu_power_seer.config import config
+from cpu_power_seer.logs.logger import log
+
+# Render jobs saved with --no-plots are stored in this subdirectory of output directory
+PLOT_JOBS_DIR = "plots"
+
+# Settings used by plot functions, rendered with the values they had when plots were submitted
+PLOT_SETTINGS = ["plot_points", "plot_density_points"]
+
+plot_executor = None
+plot_futures = []
+plot_stats = {"jobs": 0, "saved": 0, "render_time": 0.0}
+plot_lock = threading.Lock()
+
+
+# Render a plot job: (plot name, image directory relative to output_dir, plot arguments, plot keyword arguments,
+# plot settings).
+# Plot module is imported here, so processes that don't render plots don't load matplotlib. Returns
+# rendering time
+def render_plot_job(job, output_dir):
+    from cpu_power_seer.data.plot import time_series
+    plot_functions = {
+        "time_series": time_series.plot_time_series,
+        "var": time_series.plot_var,
+        "results": time_series.plot_results,
+        "model": time_series.plot_model,
+    }
+    start = time.time()
+    name, img_dir, args, kwargs, settings = job
+    for setting, value in settings.items():
+        setattr(config, setting, value)
+    config.img_dir = os.path.join(output_dir, img_dir)
+    os.makedirs(config.img_dir, exist_ok=True)
+    plot_functions[name](*args, **kwargs)
+    return time.time() - start
+
+
+def get_plot_executor():
+    global plot_executor
+    if plot_executor is None:
+        plot_executor = ProcessPoolExecutor(max_workers=config.plot_workers or os.cpu_count(),
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return plot_executor
+
+
+def save_plot_job(job, index):
+    plots_dir = f"{config.output_dir}/{PLOT_JOBS_DIR}"
+    os.makedirs(plots_dir, exist_ok=True)
+    joblib.dump(job, f"{plots_dir}/{index:05d}-{job[0]}.joblib")
+
+
+# Plot into config.img_dir with the plot function of the given name (same arguments). Plots are rendered by a pool of background processes
+# (config.plot_workers, 0 to render them in this process) or saved to be rendered later (powerseer plot)
+# when config.plots is false
+def submit_plot(name, *args, **kwargs):
+    job = (name, os.path.relpath(config.img_dir, config.output_dir), args, kwargs,
+           {setting: getattr(config, setting) for setting in PLOT_SETTINGS})
+    with plot_lock:
+        index = plot_stats["jobs"]
+        plot_stats["jobs"] += 1
+    if not config.plots:
+        save_plot_job(job, index)
+        with plot_lock:
+            plot_stats["saved"] += 1
+    elif config.plot_workers == 0:
+        render_time = render_plot_job(job, config.output_dir)
+        with plot_lock:
+            plot_stats["render_time"] += render_time
+    else:
+        future = get_plot_executor().submit(render_plot_job, job, config.output_dir)
+        with plot_lock:
+            plot_futures.append(future)
+
+
+# Wait until all submitted plots are rendered. Returns plot stats (jobs, saved jobs and rendering time)
+# since the last wait
+def wait_plots():
+    global plot_executor
+    with plot_lock:
+        futures = plot_futures.copy()
+        plot_futures.clear()
+    for future in futures:
+        render_time = future.result()
+        with plot_lock:
+            plot_stats["render_time"] += render_time
+    if plot_executor is not None:
+        plot_executor.shutdown()
+        plot_executor = None
+    with plot_lock:
+        stats = plot_stats.copy()
+        plot_stats.update(jobs=0, saved=0, render_time=0.0)
+    return stats
+
+
+def log_plot_stats(stats):
+    if stats["saved"] > 0:
+        log(f"PLOTS: {stats['saved']} render jobs saved at {config.output_dir}/{PLOT_JOBS_DIR} "
+            f"(render them with powerseer plot {config.output_dir})")
+    else:
+        log(f"PLOT RENDERING TIME: {stats['render_time']} ({stats['jobs']} plots)")
+
+
+# Saved render jobs of an output directory (and its subdirectories, e.g. sweep runs) as (output dir, job file)
+def get_saved_plot_jobs(path):
+    files = sorted(glob.glob(f"{path}/**/{PLOT_JOBS_DIR}/*.joblib", recursive=True))
+    return [(os.path.dirname(os.path.dirname(file)), file) for file in files]
+
+
+# Settings can be overridden (e.g. to render plots with other number of points than the saved one)
+def render_saved_plot_job(output_dir, file, settings=None):
+    job = joblib.load(file)
+    job[4].update(settings or {})
+    return render_plot_job(job, output_dir)
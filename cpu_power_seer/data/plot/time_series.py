@@ -28,33 +28,33 @@ def plot_var(title, df, var, filename):
     plt.close(fig)
 
 
+# Expected VS predicted values. With more than config.plot_density_points samples, their density is shown
+# instead of every sample, with quantiles of residuals of each bin of expected values plotted below
 def plot_results(expected, predicted, filename):
-    fig = plt.figure()
     expected.shape = (-1)
     predicted.shape = (-1)
-    sns.scatterplot(x=expected, y=predicted, label="Values", color='tab:orange')
+    density = config.plot_density_points and len(expected) > config.plot_density_points
+    if density:
+        fig, (ax, residual_ax) = plt.subplots(2, 1, sharex=True, figsize=(6.4, 6.4), height_ratios=(3, 1),
+                                              layout="constrained")
+        set_density_plot(expected, predicted, ax, residual_ax)
+        set_basic_labels(None, "Expected", "Residual", residual_ax)
+    else:
+        fig, ax = plt.subplots()
+        sns.scatterplot(x=expected, y=predicted, ax=ax, label="Values", color='tab:orange')
     max_val = max(max(expected), max(predicted))
-    sns.lineplot(x=[0, max_val], y=[0, max_val], ax=plt.gca(), color='black', label="Ideal Scenario")
-    set_basic_labels("Expected VS Predicted", "Expected", "Predicted", plt.gca())
-    plt.legend()
-    save_plot(filename)
+    sns.lineplot(x=[0, max_val], y=[0, max_val], ax=ax, color='black', label="Ideal Scenario")
+    set_basic_labels("Expected VS Predicted", None if density else "Expected", "Predicted", ax)
+    ax.legend()
+    # Constrained layout already fits the colorbar shared by both plots
+    save_plot(filename, tight_layout=not density)
     plt.close(fig)
 
 
-def plot_model(model, var, filename):
-    X_not_squared_position = 0
-    if hasattr(model, 'poly_features') and model.poly_features is not None:
-        X_not_squared_position = 1
-
-    X_idx = model.X_test[:, X_not_squared_position].argsort()
-    X_test = model.X_test
-    if hasattr(model, 'scaler') and model.scaler is not None:
-        X_test = model.scaler.inverse_transform(X_test)
-    X_sorted = X_test[X_idx]
-    y_sorted = model.y_pred[X_idx].ravel()
-
+# Model function from sorted values of var and their predictions
+def plot_model(x, y, var, filename):
     fig = plt.figure()
-    sns.lineplot(x=X_sorted[:, X_not_squared_position], y=y_sorted, ax=plt.gca(), color=config.x_var_color[var], label="Polynomial regression")
+    sns.lineplot(x=x, y=y, ax=plt.gca(), color=config.x_var_color[var], label="Polynomial regression")
     set_basic_labels("Model Function", config.x_var_label[var], "Power Consumption (W)", plt.gca())
     plt.legend()
     save_plot(filename)
@@ -1,14 +1,24 @@
 import seaborn as sns
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
 from matplotlib.dates import DateFormatter, AutoDateLocator
 from matplotlib.lines import Line2D
 
 from cpu_power_seer.config import config
+from cpu_power_seer.data.plot.downsample import get_minmax_indices
+from cpu_power_seer.data.plot.density import get_density, get_binned_quantiles
 
 # Use a non-interactive backend to avoid the requirement of being run from the main thread
 # Exception: main thread is not in main loop
 plt.switch_backend('agg')
 
+# Samples between markers of line plots
+MARKER_STEP = 50
+
+# Quantiles of residuals (predicted - expected) shown below density plots: band limits and median
+RESIDUAL_QUANTILES = (0.1, 0.5, 0.9)
+
 
 # It is assumed there's one key per value (config.py dicts)
 def get_key_from_value(dict, value):
@@ -30,16 +40,20 @@ def save_plot(filename, tight_layout=True):
     plt.savefig(path, bbox_inches='tight')
 
 
+# Line plot of var. Long time series are downsampled to config.plot_points points (keeping the minimum and
+# maximum of each bucket of samples) and markers keep the same density they would have with that number of samples
 def set_line_plot(var, df, ax):
-    x = df["time_diff"]
-    y = df[var]
+    indices = get_minmax_indices(df[var].to_numpy(), config.plot_points or 0)
+    x = df["time_diff"].to_numpy()
+    y = df[var].to_numpy()
     linestyle = "dashed" if var == "power_predicted" else "solid"
     color = config.x_var_color[var]
     label = config.x_var_label[var]
     marker = config.x_var_marker[var]
-    sns.lineplot(x=x, y=y, ax=ax, color=color, label=label, linestyle=linestyle)
+    sns.lineplot(x=x[indices], y=y[indices], ax=ax, color=color, label=label, linestyle=linestyle, estimator=None)
     if marker is not None:
-        ax.scatter(x[::50], y[::50], s=20, color="black", marker=marker, zorder=3, edgecolors=color, linewidths=0.2)
+        step = max(MARKER_STEP, MARKER_STEP * len(y) // config.plot_points) if config.plot_points else MARKER_STEP
+        ax.scatter(x[::step], y[::step], s=20, color="black", marker=marker, zorder=3, edgecolors=color, linewidths=0.2)
 
 
 def set_time_axis(ax):
@@ -70,3 +84,18 @@ def set_legend_with_markers(ax1, ax2):
             custom_lines.append(custom_line)
     ax1.legend(handles=custom_lines, loc="center left", bbox_to_anchor=(0, 1.5))
     ax2.get_legend().remove()
+
+
+# Density of (expected, predicted) samples (log scale) on ax and, on residual_ax, a band of quantiles of
+# residuals (predicted - expected) of each bin of expected values along with their median
+def set_density_plot(expected, predicted, ax, residual_ax):
+    counts, edges = get_density(expected, predicted)
+    mesh = ax.pcolormesh(edges, edges, np.ma.masked_equal(counts.T, 0), cmap="Oranges", norm=LogNorm())
+    plt.colorbar(mesh, ax=[ax, residual_ax], label="Samples")
+    centers, (low, median, high) = get_binned_quantiles(expected, predicted - expected, list(RESIDUAL_QUANTILES))
+    low_label, median_label, high_label = (f"{quantile * 100:.0f}" for quantile in RESIDUAL_QUANTILES)
+    residual_ax.fill_between(centers, low, high, color="tab:blue", alpha=0.3,
+                             label=f"Residual P{low_label}-P{high_label}")
+    residual_ax.plot(centers, median, color="tab:blue", label=f"Residual P{median_label}")
+    residual_ax.axhline(0, color="black")
+    residual_ax.legend()
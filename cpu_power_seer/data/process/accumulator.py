@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+INITIAL_CAPACITY = 1024
+GROWTH_FACTOR = 2
+
+
+def is_datetime(dtype):
+    return isinstance(dtype, pd.DatetimeTZDtype) or (isinstance(dtype, np.dtype) and dtype.kind == "M")
+
+
+# Store one array per column, converting dates to int64 nanoseconds
+def get_column_values(series):
+    if is_datetime(series.dtype):
+        return pd.DatetimeIndex(series).as_unit("ns").asi8
+    return series.to_numpy()
+
+
+# Accumulate DataFrames with the same columns in preallocated NumPy arrays (one per column). Arrays
+# grow geometrically, so appending n rows costs amortized O(n) and only one DataFrame is built at the end
+class ColumnarAccumulator:
+
+    def __init__(self, columns, capacity=INITIAL_CAPACITY):
+        self.columns = list(columns)
+        self.capacity = capacity
+        self.size = 0
+        self.arrays = {}
+        self.dtypes = {}
+
+    def __len__(self):
+        return self.size
+
+    # Filled part of a column (writable view)
+    def __getitem__(self, column):
+        return self.arrays[column][:self.size] if column in self.arrays else np.empty(0)
+
+    def __setitem__(self, column, values):
+        if column in self.arrays:
+            if isinstance(values, str):
+                values = np.full(self.size, values, dtype=object)
+            self.set_values(column, np.asarray(values), 0)
+
+    def reserve(self, size):
+        if size <= self.capacity:
+            return
+        while self.capacity < size:
+            self.capacity *= GROWTH_FACTOR
+        for column, array in self.arrays.items():
+            new_array = np.empty(self.capacity, dtype=array.dtype)
+            new_array[:self.size] = array[:self.size]
+            self.arrays[column] = new_array
+
+    # Copy values into column from position start, promoting column type if needed
+    def set_values(self, column, values, start):
+        array = self.arrays[column]
+        dtype = np.result_type(array.dtype, values.dtype) if array.dtype != object and values.dtype != object \
+            else np.dtype(object)
+        if dtype != array.dtype:
+            array = array.astype(dtype)
+            self.arrays[column] = array
+        array[start:start + len(values)] = values
+
+    def append(self, df):
+        n = len(df)
+        if n == 0:
+            return
+        self.reserve(self.size + n)
+        for column in self.columns:
+            values = get_column_values(df[column])
+            if column not in self.arrays:
+                self.dtypes[column] = df[column].dtype
+                self.arrays[column] = np.empty(self.capacity, dtype=values.dtype)
+            self.set_values(column, values, self.size)
+        self.size += n
+
+    def to_frame(self):
+        data = {}
+        for column in self.columns:
+            if column not in self.arrays:
+                data[column] = pd.Series(dtype=object)
+                continue
+            values = self.arrays[column][:self.size]
+            dtype = self.dtypes[column]
+            if isinstance(dtype, pd.DatetimeTZDtype):
+                data[column] = pd.to_datetime(values, utc=True).tz_convert(dtype.tz)
+            elif is_datetime(dtype):
+                data[column] = pd.to_datetime(values)
+            else:
+                data[column] = values.copy()
+        return pd.DataFrame(data)
@@ -0,0 +1,79 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from cpu_power_seer.logs.logger import log
+
+alignment_lock = threading.Lock()
+alignment_stats = {"samples": 0, "aligned": 0, "filled": 0, "dropped_missing": 0, "dropped_outliers": 0}
+
+
+# Position of the nearest time in sorted times for each query time
+def get_nearest(times, query_times):
+    right = np.clip(np.searchsorted(times, query_times), 1, len(times) - 1)
+    left = right - 1
+    use_left = np.abs(query_times - times[left]) <= np.abs(times[right] - query_times)
+    return np.where(use_left, left, right)
+
+
+# Align vars time series on the samples of the reference var (power if available). Each var sample is
+# taken from its nearest sample (in time) within tolerance (ns). Rows where any var has no sample within
+# tolerance or its sample is not valid (e.g. an outlier) are dropped. exp_data holds a time column and
+# one column per var (NaN where a var has no sample at that time) and valid one boolean mask per var
+def align_vars(exp_data, _vars, valid, tolerance_ns):
+    times = pd.DatetimeIndex(exp_data["time"]).as_unit("ns").asi8
+    order = np.argsort(times, kind="stable")
+    times = times[order]
+    reference = "power" if "power" in _vars else _vars[0]
+
+    ref_values = exp_data[reference].to_numpy(dtype=np.float64)[order]
+    ref_present = ~np.isnan(ref_values)
+    ref_times = times[ref_present]
+    found_all = np.ones(len(ref_times), dtype=bool)
+    valid_all = np.asarray(valid[reference], dtype=bool)[order][ref_present]
+    filled = np.zeros(len(ref_times), dtype=bool)
+    aligned = {}
+    for var in _vars:
+        values = exp_data[var].to_numpy(dtype=np.float64)[order]
+        if var == reference:
+            aligned[var] = values[ref_present]
+            continue
+        present = ~np.isnan(values)
+        var_times, var_values = times[present], values[present]
+        var_valid = np.asarray(valid[var], dtype=bool)[order][present]
+        if len(var_times) == 0:
+            found_all[:] = False
+            aligned[var] = np.full(len(ref_times), np.nan)
+            continue
+        if len(var_times) == 1:
+            nearest = np.zeros(len(ref_times), dtype=np.int64)
+        else:
+            nearest = get_nearest(var_times, ref_times)
+        distance = np.abs(var_times[nearest] - ref_times)
+        found = distance <= tolerance_ns
+        found_all &= found
+        valid_all &= ~found | var_valid[nearest]
+        filled |= found & (distance > 0)
+        aligned[var] = var_values[nearest]
+
+    keep = found_all & valid_all
+    update_alignment_stats(len(ref_times), int(keep.sum()), int((keep & filled).sum()),
+                           int((~found_all).sum()), int((found_all & ~valid_all).sum()))
+    df = pd.DataFrame({var: aligned[var][keep] for var in _vars})
+    df["time"] = pd.to_datetime(ref_times[keep], utc=True)
+    return df
+
+
+def update_alignment_stats(samples, aligned, filled, dropped_missing, dropped_outliers):
+    with alignment_lock:
+        alignment_stats["samples"] += samples
+        alignment_stats["aligned"] += aligned
+        alignment_stats["filled"] += filled
+        alignment_stats["dropped_missing"] += dropped_missing
+        alignment_stats["dropped_outliers"] += dropped_outliers
+
+
+def log_alignment_stats():
+    log(f"ALIGNED SAMPLES: {alignment_stats['aligned']} of {alignment_stats['samples']} "
+        f"({alignment_stats['filled']} filled within tolerance, {alignment_stats['dropped_missing']} dropped by "
+        f"missing values, {alignment_stats['dropped_outliers']} dropped by outliers)")
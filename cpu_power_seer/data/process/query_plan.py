@@ -0,0 +1,50 @@
+import math
+from datetime import timedelta
+
+
+# Group timestamps into ranges that can be retrieved with a single query. Consecutive periods (sorted by
+# start date) are merged while the gap between them is at most max_gap seconds and the resulting range
+# doesn't last more than max_span seconds. Returns a list of (range_timestamp, timestamps_indices)
+def coalesce_timestamps(timestamps, max_gap, max_span):
+    order = sorted(range(len(timestamps)), key=lambda i: timestamps[i][0])
+    if max_gap is None:
+        return [(timestamps[i], [i]) for i in order]
+
+    ranges = []
+    range_start, range_stop, indices = None, None, []
+    for i in order:
+        start_date, stop_date, exp_type = timestamps[i]
+        if indices and start_date - range_stop <= timedelta(seconds=max_gap) \
+                and max(range_stop, stop_date) - range_start <= timedelta(seconds=max_span):
+            range_stop = max(range_stop, stop_date)
+            indices.append(i)
+            continue
+        if indices:
+            ranges.append((get_range_timestamp(timestamps, range_start, range_stop, indices), indices))
+        range_start, range_stop, indices = start_date, stop_date, [i]
+    if indices:
+        ranges.append((get_range_timestamp(timestamps, range_start, range_stop, indices), indices))
+    return ranges
+
+
+# Ranges with only one period keep its original timestamp (and type)
+def get_range_timestamp(timestamps, range_start, range_stop, indices):
+    if len(indices) == 1:
+        return timestamps[indices[0]]
+    return range_start, range_stop, "RANGE"
+
+
+# Get data from one period out of the data retrieved for its range. InfluxDB windows are labeled with
+# their stop time and aligned to epoch, so only windows after the first window boundary of the period lie
+# entirely in it (the window before it also averages samples from before the period and is dropped). Samples
+# of all variables are cut at stop - shift of the most shifted variable (e.g. loads). Slices don't hold exactly
+# the rows of per-period queries: those also return the partial first and last windows of the period and
+# unshifted variables up to stop
+def slice_period(range_data, timestamp, time_shift, window):
+    start_date, stop_date, exp_type = timestamp
+    start_seconds = start_date.replace(microsecond=0).timestamp()
+    start_date = start_date.replace(microsecond=0) + timedelta(seconds=math.ceil(start_seconds / window) * window
+                                                               - start_seconds)
+    stop_date = stop_date - timedelta(seconds=time_shift)
+    mask = (range_data["time"] > start_date) & (range_data["time"] <= stop_date)
+    return range_data[mask]
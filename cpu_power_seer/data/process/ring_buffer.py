@@ -0,0 +1,37 @@
+import numpy as np
+
+
+# Fixed capacity buffer of the newest (time, value) samples of a time series, sorted by time. When it is
+# full, new samples overwrite the oldest ones
+class RingBuffer:
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros(capacity)
+        self.start = 0
+        self.size = 0
+
+    def get_positions(self):
+        return (self.start + np.arange(self.size)) % self.capacity
+
+    def get(self):
+        positions = self.get_positions()
+        return self.times[positions], self.values[positions]
+
+    # Samples at or after time are removed, so they can be replaced (e.g. by updated aggregations)
+    def truncate(self, time):
+        self.size = int(np.searchsorted(self.times[self.get_positions()], time, side="left"))
+
+    def extend(self, times, values):
+        if len(times) == 0:
+            return
+        self.truncate(times[0])
+        times, values = times[-self.capacity:], values[-self.capacity:]
+        positions = (self.start + self.size + np.arange(len(times))) % self.capacity
+        self.times[positions] = times
+        self.values[positions] = values
+        self.size += len(times)
+        if self.size > self.capacity:
+            self.start = (self.start + self.size - self.capacity) % self.capacity
+            self.size = self.capacity
@@ -0,0 +1,21 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+
+# Copy array into a new shared memory block. Returns the block (its creator must close and unlink it)
+# and the spec needed to attach the array from other processes
+def share_array(array):
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+# Attach a read-only array shared by share_array. Block must be closed once the array (and any view of it)
+# is no longer referenced
+def attach_array(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    array.flags.writeable = False
+    return shm, array
@@ -1,20 +1,28 @@
+import asyncio
+import math
 import warnings
 import pandas as pd
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import threading
 
 from cpu_power_seer.config import config
 from cpu_power_seer.logs.logger import log
-from cpu_power_seer.influxdb.influxdb_queries import var_query
-from cpu_power_seer.influxdb.influxdb import query_influxdb
+from cpu_power_seer.influxdb.influxdb_queries import get_time_shift, parse_duration
+from cpu_power_seer.influxdb.influxdb import get_default_pool_size, DEFAULT_WINDOW, InfluxDBQueryError
+from cpu_power_seer.datasource.sources import get_data_source
+from cpu_power_seer.data.process.query_plan import coalesce_timestamps, slice_period
+from cpu_power_seer.data.process.accumulator import ColumnarAccumulator
+from cpu_power_seer.data.process.alignment import align_vars
 
-current_vars = []
 OUT_RANGE = 1.5
+AUTO_WINDOWS = [2, 4, 6, 10, 20, 30, 60, 120, 300, 600, 1800, 3600]  # seconds
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 
 # Time unit fixer, it only adjusts forward, i.e. from seconds/minutes to minutes/hours
+# (df can be a DataFrame or a ColumnarAccumulator)
 def fix_time_units(df, current, prev):
     if current == "hours" and prev == "seconds":
         df["time_diff"] = df["time_diff"] / 3600
@@ -44,66 +52,147 @@ def set_time_diff(df, time_column, initial_date=None):
         df["time_unit"] = 'hours'
 
 
-# Remove outliers for a specified column
-def remove_outliers(df, column):
-    q1 = df[column].quantile(0.25)
-    q3 = df[column].quantile(0.75)
+# Mask of values that are not outliers (bounds are computed from the values of the column only, missing values are ignored)
+def get_inliers(column):
+    q1 = column.quantile(0.25)
+    q3 = column.quantile(0.75)
     iqr = q3 - q1
     lower_bound = q1 - OUT_RANGE * iqr
     upper_bound = q3 + OUT_RANGE * iqr
-    df_filtered = df[(df[column] >= lower_bound) & (df[column] <= upper_bound)]
-    return df_filtered
+    return ((column >= lower_bound) & (column <= upper_bound)).to_numpy()
 
 
-# Get data for a given period (obtained from timestamps)
-def get_experiment_data(timestamp):
-    global current_vars
-    tid = threading.get_ident()
+def get_query_dates(timestamp):
+    start_date, stop_date, exp_type = timestamp
+    return start_date.strftime("%Y-%m-%dT%H:%M:%SZ"), stop_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# Format data retrieved for a given period: keep only _vars and time columns, align _vars samples
+# (nearest sample within tolerance) and remove rows with missing values or outliers. Raises ValueError
+# if some var wasn't retrieved
+def format_experiment_data(_vars, exp_data, timestamp, worker):
     start_date, stop_date, exp_type = timestamp
-    start_str = start_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-    stop_str = stop_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-    if config.verbose:
-        log(f"[Thread {tid}] Querying data to InfluxDB between {start_str} and {stop_str}")
-
-    # Get current_vars time series and merge data
-    exp_data = pd.DataFrame()
-    for var in current_vars:
-        df = query_influxdb(var_query[var], start_str, stop_str, config.influxdb_bucket)
-        if not df.empty:
-            df = remove_outliers(df, "_value")
-            df.rename(columns={'_value': var}, inplace=True)
-            df = df[["_time", var]]
-            if exp_data.empty:
-                exp_data = df
-            else:
-                exp_data = pd.merge(exp_data, df, on='_time')
-    exp_data.rename(columns={'_time': 'time'}, inplace=True)
 
     # Remove DataFrame useless variables
     try:
-        exp_data = exp_data[current_vars + ["time"]]
+        exp_data = exp_data[_vars + ["time"]]
     except KeyError:
-        log(f"[Thread {tid}] Error getting data between {start_date} and {stop_date}", "ERR")
-        print(exp_data)
-        exit(1)
-    return exp_data
+        raise ValueError(f"[{worker}] Error getting data between {start_date} and {stop_date} "
+                         f"(retrieved columns: {list(exp_data.columns)})")
+    inliers = {var: get_inliers(exp_data[var]) for var in _vars}
+    return align_vars(exp_data, _vars, inliers, get_align_tolerance())
 
 
-# Parallelise data retrieval from InfluxDB
-def get_parallel_time_series(_vars, timestamps):
-    global current_vars
-    current_vars = _vars.copy()
-    time_series = pd.DataFrame(columns=current_vars)
+# Get data for a given period (obtained from timestamps)
+def get_experiment_data(source, _vars, window, timestamp):
+    worker = f"Thread {threading.get_ident()}"
+    start_str, stop_str = get_query_dates(timestamp)
+    if config.verbose:
+        log(f"[{worker}] Querying data to {source.name} between {start_str} and {stop_str}")
+
+    # Get _vars time series (already joined by _time)
+    exp_data = source.query_vars(_vars, start_str, stop_str, window)
+    return exp_data.rename(columns={'_time': 'time'})
+
+
+# Async version of get_experiment_data. Semaphore limits the number of concurrent queries
+async def get_experiment_data_async(source, query_api, semaphore, _vars, window, timestamp, index):
+    worker = f"Task {index}"
+    start_str, stop_str = get_query_dates(timestamp)
+    async with semaphore:
+        if config.verbose:
+            log(f"[{worker}] Querying data to {source.name} between {start_str} and {stop_str}")
+        exp_data = await source.query_vars_async(query_api, _vars, start_str, stop_str, window)
+    return exp_data.rename(columns={'_time': 'time'})
+
+
+# Retrieve all periods concurrently using a single event loop. Results keep timestamps order
+async def get_async_experiments_data(source, _vars, window, timestamps):
+    semaphore = asyncio.Semaphore(get_fetch_concurrency())
+    async with source.create_async_client() as client:
+        query_api = client.query_api()
+        return await asyncio.gather(*(get_experiment_data_async(source, query_api, semaphore, _vars, window,
+                                                                timestamp, i)
+                                      for i, timestamp in enumerate(timestamps)))
+
+
+# Aggregation window used to retrieve timestamps periods. When window is "auto", the smallest window
+# from AUTO_WINDOWS that keeps the number of rows of all periods below the row budget is used
+def get_window(timestamps):
+    window = config.window if config.window is not None else DEFAULT_WINDOW
+    if window != "auto":
+        return window
+    total_seconds = sum((stop_date - start_date).total_seconds() for start_date, stop_date, _ in timestamps)
+    min_seconds = max(parse_duration(DEFAULT_WINDOW), total_seconds / config.row_budget)
+    seconds = next((w for w in AUTO_WINDOWS if w >= min_seconds), math.ceil(min_seconds))
+    window = f"{seconds}s"
+    if config.verbose:
+        log(f"Using {window} aggregation window for {total_seconds:.0f} s of time series (row budget: {config.row_budget})")
+    return window
 
-    executor = ThreadPoolExecutor()
-    results = executor.map(get_experiment_data, timestamps)
-    executor.shutdown()
 
-    for result in results:
-        result.dropna(inplace=True)
-        time_series = pd.concat([time_series, result], ignore_index=True)
+# Choose the "auto" window once per run from train timestamps (idle periods included), so train, idle,
+# temperature and test time series are all retrieved with the same window
+def resolve_window(timestamps):
+    config.window = get_window(timestamps)
 
-    return time_series
+
+# Alignment tolerance in nanoseconds
+def get_align_tolerance():
+    return int((config.align_tolerance or 0) * 1e9)
+
+
+def get_fetch_concurrency():
+    if config.fetch_concurrency is not None:
+        return config.fetch_concurrency
+    if config.influxdb_pool_size is not None:
+        return config.influxdb_pool_size
+    return get_default_pool_size()
+
+
+# Parallelise data retrieval from data source. Close periods are retrieved together (one query per range)
+# and then split locally when coalescing is enabled (config.coalesce_gap). Returns the time series of each period (in timestamps order)
+def get_periods_time_series(_vars, timestamps, window=None):
+    _vars = _vars.copy()
+    ranges = coalesce_timestamps(timestamps, config.coalesce_gap, config.coalesce_span)
+    range_timestamps = [r[0] for r in ranges]
+    if config.verbose:
+        log(f"{len(timestamps)} periods will be retrieved using {len(ranges)} queries")
+
+    window = window if window is not None else get_window(timestamps)
+    source = get_data_source()
+    try:
+        if config.fetch_backend == "async" and source.supports_async:
+            range_results = asyncio.run(get_async_experiments_data(source, _vars, window, range_timestamps))
+        else:
+            with ThreadPoolExecutor(max_workers=get_fetch_concurrency()) as executor:
+                range_results = list(executor.map(partial(get_experiment_data, source, _vars, window),
+                                                  range_timestamps))
+    except InfluxDBQueryError as e:
+        log(f"{e}", "ERR")
+        exit(1)
+
+    # Split ranges into periods keeping timestamps order
+    window_seconds = parse_duration(window)
+    time_shift = max(get_time_shift(var, window_seconds) for var in _vars)
+    results = [None] * len(timestamps)
+    for (range_timestamp, indices), range_data in zip(ranges, range_results):
+        for i in indices:
+            period_data = slice_period(range_data, timestamps[i], time_shift, window_seconds) \
+                if len(indices) > 1 else range_data
+            try:
+                results[i] = format_experiment_data(_vars, period_data, timestamps[i], f"Range {range_timestamp[0]}")
+            except ValueError as e:
+                log(f"{e}", "ERR")
+                exit(1)
+    return results
+
+
+def get_parallel_time_series(_vars, timestamps):
+    time_series = ColumnarAccumulator(_vars + ["time"])
+    for result in get_periods_time_series(_vars, timestamps):
+        time_series.append(result)
+    return time_series.to_frame()
 
 
 # Get _vars time series from timestamps
@@ -0,0 +1,4 @@
+from .datasource import DataSource
+from .influxdb_source import InfluxDBSource
+from .local_source import LocalSource
+from .sources import get_data_source, close_data_source
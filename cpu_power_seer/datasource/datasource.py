@@ -0,0 +1,16 @@
+# Interface of time series providers. query_vars must return a DataFrame with a _time column
+# (UTC dates) and one column per var (only vars with data), following the aggregation
+# defined by the queries in influxdb_queries.py with the specified window (Flux duration)
+class DataSource:
+    name = None
+    supports_async = False
+
+    # Check that data can be retrieved from this source (exit otherwise)
+    def check(self):
+        pass
+
+    def query_vars(self, _vars, start_str, stop_str, window):
+        raise NotImplementedError
+
+    def close(self):
+        pass
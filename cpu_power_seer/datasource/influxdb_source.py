@@ -0,0 +1,57 @@
+import asyncio
+import pandas as pd
+
+from cpu_power_seer.config import config
+from cpu_power_seer.datasource.datasource import DataSource
+from cpu_power_seer.influxdb.influxdb_queries import build_vars_query
+from cpu_power_seer.influxdb.influxdb import query_influxdb, check_bucket_exists, close_client
+from cpu_power_seer.influxdb.influxdb_async import query_influxdb_async, create_async_client
+from cpu_power_seer.influxdb.influxdb_cache import cached_query, get_cached, write_cache, bucket_is_cached, \
+    log_cache_stats
+
+
+# Keep only _time and requested vars columns from query results
+def select_vars(df, _vars):
+    if df.empty:
+        return pd.DataFrame(columns=["_time"])
+    return df[["_time"] + [var for var in _vars if var in df.columns]]
+
+
+class InfluxDBSource(DataSource):
+    name = "InfluxDB"
+    supports_async = True
+
+    def check(self):
+        # Repeated runs using cached data don't need to reach InfluxDB server
+        if config.cache_mode != "use" or not bucket_is_cached(config.influxdb_bucket):
+            check_bucket_exists(config.influxdb_bucket)
+
+    # Get vars time series (one column per var) between start and stop dates from cache or InfluxDB
+    def query_vars(self, _vars, start_str, stop_str, window):
+        query = build_vars_query(_vars)
+
+        def fetch():
+            return select_vars(query_influxdb(query, start_str, stop_str, config.influxdb_bucket, window,
+                                              columns=_vars), _vars)
+        return cached_query(fetch, query, start_str, stop_str, config.influxdb_bucket, window)
+
+    # Async version of query_vars. Cache files are read and written in worker threads, so they don't block
+    # the event loop
+    async def query_vars_async(self, query_api, _vars, start_str, stop_str, window):
+        query = build_vars_query(_vars)
+        path, df = None, None
+        if config.cache_mode != "bypass":
+            path, df = await asyncio.to_thread(get_cached, query, start_str, stop_str, config.influxdb_bucket, window)
+        if df is None:
+            df = select_vars(await query_influxdb_async(query_api, query, start_str, stop_str,
+                                                        config.influxdb_bucket, window, columns=_vars), _vars)
+            if path is not None:
+                await asyncio.to_thread(write_cache, path, df)
+        return df
+
+    def create_async_client(self):
+        return create_async_client()
+
+    def close(self):
+        log_cache_stats()
+        close_client(print_stats=True)
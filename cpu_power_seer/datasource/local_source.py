@@ -0,0 +1,221 @@
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+
+from cpu_power_seer.config import config
+from cpu_power_seer.datasource.datasource import DataSource
+from cpu_power_seer.influxdb.influxdb_queries import parse_duration, get_time_shift
+from cpu_power_seer.logs.logger import log
+
+LINE_PROTOCOL_EXTENSIONS = (".lp", ".line", ".txt")
+PARQUET_EXTENSIONS = (".parquet",)
+
+# Measurements used by the queries from influxdb_queries.py, other measurements are discarded when loading
+LOCAL_MEASUREMENTS = {"percpu", "cpu_frequency", "POWER_PACKAGE", "sensors"}
+
+# Columns from Influx exports that don't identify a series
+NON_TAG_COLUMNS = {"_time", "_value", "_measurement", "_field", "_start", "_stop", "result", "table"}
+
+POWER_FIELDS = ["rapl:::PACKAGE_ENERGY:PACKAGE0(W)", "rapl:::PACKAGE_ENERGY:PACKAGE1(W)"]
+TEMP_LABELS = ["Package id 0", "Package id 1"]
+
+# Line protocol: <measurement>[,<tag>=<value>...] <field>=<value>[,<field>=<value>...] [timestamp]
+LINE_RE = re.compile(r'^((?:[^ \\]|\\.)+) ((?:[^ "\\]|\\.|"(?:[^"\\]|\\.)*")+)(?: (-?\d+))?\s*$')
+FIELD_RE = re.compile(r'((?:[^,=\\]|\\.)+)=("(?:[^"\\]|\\.)*"|[^,]*)')
+ESCAPE_RE = re.compile(r'\\(.)')
+UNESCAPED_COMMA_RE = re.compile(r'(?<!\\),')
+
+
+def unescape(value):
+    return ESCAPE_RE.sub(r'\1', value)
+
+
+# Parse numeric field values (strings and booleans are discarded)
+def parse_field_value(value):
+    if not value or value[0] == '"':
+        return None
+    if value[-1] in "iu":
+        value = value[:-1]
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+# Parse line protocol lines (nanosecond precision) into rows (one per field value)
+def parse_line_protocol(lines):
+    rows = []
+    for line in lines:
+        # Skip comments and measurements not used by any query before parsing the whole line
+        measurement_end = re.search(r'(?<!\\)[, ]', line)
+        if line.startswith("#") or measurement_end is None \
+                or unescape(line[:measurement_end.start()]) not in LOCAL_MEASUREMENTS:
+            continue
+        match = LINE_RE.match(line)
+        if match is None or match.group(3) is None:
+            continue
+        key, fields, timestamp = match.groups()
+        key_parts = UNESCAPED_COMMA_RE.split(key)
+        tags = dict(unescape(tag).split("=", 1) for tag in key_parts[1:])
+        for field, value in FIELD_RE.findall(fields):
+            value = parse_field_value(value)
+            if value is not None:
+                rows.append({"_time": int(timestamp), "_measurement": unescape(key_parts[0]),
+                             "_field": unescape(field), "_value": value, **tags})
+    return rows
+
+
+def get_measurements_frame(rows):
+    return pd.DataFrame(rows, columns=None if rows else ["_time", "_measurement", "_field", "_value"])
+
+
+# Read a line protocol file into a long DataFrame (one row per field value)
+def read_line_protocol(path):
+    with open(path, 'r') as f:
+        return get_measurements_frame(parse_line_protocol(f))
+
+
+# Read a Parquet export (e.g. from query_data_frame) with _time, _measurement, _field, _value and tags columns
+def read_parquet_export(path):
+    df = pd.read_parquet(path)
+    df = df[df["_measurement"].isin(LOCAL_MEASUREMENTS)]
+    df = df.drop(columns=[c for c in ("_start", "_stop", "result", "table") if c in df.columns])
+    df["_time"] = pd.DatetimeIndex(pd.to_datetime(df["_time"], utc=True)).as_unit("ns").asi8
+    df["_value"] = pd.to_numeric(df["_value"], errors="coerce")
+    return df.dropna(subset=["_value"])
+
+
+# aggregateWindow windows are aligned to epoch and labeled with their stop time (truncated at range stop)
+def get_window_labels(times, window_ns, stop_ns):
+    return np.minimum((times // window_ns) * window_ns + window_ns, stop_ns)
+
+
+def get_series_columns(df):
+    return ["_field"] + [c for c in df.columns if c not in NON_TAG_COLUMNS]
+
+
+def select_rows(period, measurement, fields, labels=None):
+    mask = (period["_measurement"] == measurement) & period["_field"].isin(fields)
+    if labels is not None:
+        mask &= period["label"].isin(labels) if "label" in period.columns else False
+    return period[mask]
+
+
+# Mean of each series per window: aggregateWindow(every: window, fn: mean)
+def window_mean(df, window_ns, stop_ns):
+    labels = get_window_labels(df["_time"].values, window_ns, stop_ns)
+    grouped = df.assign(_time=labels).groupby(get_series_columns(df) + ["_time"], dropna=False, observed=True)
+    return grouped["_value"].mean().reset_index()
+
+
+# Same as load queries: mean per series (core and field), shift and sum of all series per window
+def load_values(period, fields, shift_ns, window_ns, stop_ns):
+    means = window_mean(select_rows(period, "percpu", fields), window_ns, stop_ns)
+    labels = get_window_labels(means["_time"].values - shift_ns, window_ns, stop_ns - shift_ns)
+    return means["_value"].groupby(labels).sum()
+
+
+def freq_values(period, field, window_ns, stop_ns):
+    means = window_mean(select_rows(period, "cpu_frequency", [field]), window_ns, stop_ns)
+    return means["_value"].groupby(means["_time"].values).mean()
+
+
+# Same as power and temp queries: mean per series and sum of all series (packages) per window
+def sum_of_means(df, window_ns, stop_ns):
+    means = window_mean(df, window_ns, stop_ns)
+    return means["_value"].groupby(means["_time"].values).sum()
+
+
+def get_var_values(var, period, window_ns, stop_ns):
+    shift_ns = int(get_time_shift(var, window_ns / 1e9) * 1e9)
+    if var == "load":
+        return load_values(period, ["user", "system"], shift_ns, window_ns, stop_ns)
+    if var == "user_load":
+        return load_values(period, ["user"], shift_ns, window_ns, stop_ns)
+    if var == "system_load":
+        return load_values(period, ["system"], shift_ns, window_ns, stop_ns)
+    if var == "wait_load":
+        return load_values(period, ["iowait"], shift_ns, window_ns, stop_ns)
+    if var == "freq":
+        return freq_values(period, "average", window_ns, stop_ns)
+    if var == "sumfreq":
+        return freq_values(period, "sum", window_ns, stop_ns) / 1000.0
+    if var == "power":
+        return sum_of_means(select_rows(period, "POWER_PACKAGE", POWER_FIELDS), window_ns, stop_ns)
+    if var == "temp":
+        return sum_of_means(select_rows(period, "sensors", ["value"], TEMP_LABELS), window_ns, stop_ns)
+
+
+# Vars time series (same format as DataSource.query_vars) from measurements sorted by time
+def query_measurements(data, times, _vars, start_str, stop_str, window):
+    start_ns, stop_ns = pd.Timestamp(start_str).value, pd.Timestamp(stop_str).value
+    window_ns = int(parse_duration(window) * 1e9)
+    first, last = np.searchsorted(times, [start_ns, stop_ns], side="left")
+    period = data.iloc[first:last]
+
+    columns = {}
+    for var in _vars:
+        values = get_var_values(var, period, window_ns, stop_ns)
+        if not values.empty:
+            columns[var] = values
+    if not columns:
+        return pd.DataFrame(columns=["_time"])
+    df = pd.concat(columns, axis=1).sort_index()
+    df.index = pd.to_datetime(df.index, utc=True)
+    return df.rename_axis("_time").reset_index()
+
+
+# Glances/RAPL measurements exported from InfluxDB to line protocol or Parquet files. If data directory
+# has a subdirectory named as the bucket, only files from that subdirectory are used
+class LocalSource(DataSource):
+    name = "local files"
+
+    def __init__(self):
+        self.data = None
+        self.times = None
+        self.lock = threading.Lock()
+
+    def get_data_path(self):
+        bucket_path = os.path.join(config.data_dir, config.influxdb_bucket)
+        return bucket_path if os.path.isdir(bucket_path) else config.data_dir
+
+    def get_files(self):
+        files = []
+        for root, _, names in os.walk(self.get_data_path()):
+            for name in sorted(names):
+                if name.endswith(LINE_PROTOCOL_EXTENSIONS + PARQUET_EXTENSIONS):
+                    files.append(os.path.join(root, name))
+        return files
+
+    def check(self):
+        if config.data_dir is None or not os.path.isdir(config.data_dir):
+            log(f"Specified non existent data directory: {config.data_dir}", "ERR")
+            exit(1)
+        if not self.get_files():
+            log(f"No line protocol ({', '.join(LINE_PROTOCOL_EXTENSIONS)}) or Parquet files found in "
+                f"{self.get_data_path()}", "ERR")
+            exit(1)
+
+    # All files are loaded once into a single DataFrame sorted by time
+    def load(self):
+        with self.lock:
+            if self.data is None:
+                frames = []
+                for file in self.get_files():
+                    log(f"Loading measurements from {file}")
+                    if file.endswith(PARQUET_EXTENSIONS):
+                        frames.append(read_parquet_export(file))
+                    else:
+                        frames.append(read_line_protocol(file))
+                data = pd.concat(frames, ignore_index=True)
+                data["_time"] = data["_time"].astype(np.int64)
+                self.data = data.sort_values("_time", kind="stable", ignore_index=True)
+                self.times = self.data["_time"].values
+                log(f"Loaded {len(self.data)} measurements from {config.data_dir}")
+            return self.data
+
+    def query_vars(self, _vars, start_str, stop_str, window):
+        data = self.load()
+        return query_measurements(data, self.times, _vars, start_str, stop_str, window)
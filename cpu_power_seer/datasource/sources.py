@@ -0,0 +1,30 @@
+import threading
+
+from cpu_power_seer.config import config
+from cpu_power_seer.datasource.influxdb_source import InfluxDBSource
+from cpu_power_seer.datasource.local_source import LocalSource
+
+data_sources = {
+    "influxdb": InfluxDBSource,
+    "local": LocalSource
+}
+
+data_source = None
+data_source_lock = threading.Lock()
+
+
+# Data source shared by the whole process (selected by config.data_source)
+def get_data_source():
+    global data_source
+    with data_source_lock:
+        if data_source is None:
+            data_source = data_sources[config.data_source]()
+        return data_source
+
+
+def close_data_source():
+    global data_source
+    with data_source_lock:
+        if data_source is not None:
+            data_source.close()
+            data_source = None
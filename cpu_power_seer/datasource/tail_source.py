@@ -0,0 +1,60 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from cpu_power_seer.datasource.datasource import DataSource
+from cpu_power_seer.datasource.local_source import parse_line_protocol, get_measurements_frame, query_measurements
+from cpu_power_seer.logs.logger import log
+
+
+# Local stand-in of a live InfluxDB bucket: line protocol appended to a file (e.g. by a Glances or Telegraf
+# file export) is read incrementally on every query. Measurements older than retention (ns) from the
+# newest one are discarded
+class TailSource(DataSource):
+    name = "local file (tail)"
+
+    def __init__(self, path, retention_ns):
+        self.path = path
+        self.retention_ns = retention_ns
+        self.offset = 0
+        self.partial_line = b""
+        self.data = get_measurements_frame([])
+        self.times = np.array([], dtype=np.int64)
+        self.lock = threading.Lock()
+
+    def check(self):
+        if self.path is None or not os.path.isfile(self.path):
+            log(f"Specified non existent data file: {self.path}", "ERR")
+            exit(1)
+
+    # Only complete lines are parsed, the last partial line is kept until it is completed
+    def read_new_lines(self):
+        if os.path.getsize(self.path) < self.offset:
+            log(f"File {self.path} has been truncated. Reading it from the beginning", "WARN")
+            self.offset = 0
+            self.partial_line = b""
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+            self.offset = f.tell()
+        lines = (self.partial_line + chunk).split(b"\n")
+        self.partial_line = lines.pop()
+        return [line.decode() for line in lines]
+
+    def update(self):
+        rows = parse_line_protocol(self.read_new_lines())
+        if rows:
+            data = get_measurements_frame(rows)
+            if not self.data.empty:
+                data = pd.concat([self.data, data], ignore_index=True)
+            data["_time"] = data["_time"].astype(np.int64)
+            data = data.sort_values("_time", kind="stable", ignore_index=True)
+            self.data = data[data["_time"].values >= data["_time"].values[-1] - self.retention_ns]
+            self.data = self.data.reset_index(drop=True)
+            self.times = self.data["_time"].values
+
+    def query_vars(self, _vars, start_str, stop_str, window):
+        with self.lock:
+            self.update()
+            return query_measurements(self.data, self.times, _vars, start_str, stop_str, window)
@@ -0,0 +1,3 @@
+from .linear_model import LinearPowerModel, load_linear_model
+from .pipeline_model import PipelineModel, load_model
+from .batcher import MicroBatcher, LatencyStats
@@ -0,0 +1,100 @@
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+
+# Latencies kept to compute percentiles
+LATENCY_WINDOW = 100000
+
+
+# Latency (from enqueueing a request to getting its predictions) and batching statistics
+class LatencyStats:
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.samples = 0
+        self.batches = 0
+
+    def record_batch(self, latencies, n_samples):
+        with self.lock:
+            self.latencies.extend(latencies)
+            self.requests += len(latencies)
+            self.samples += n_samples
+            self.batches += 1
+
+    # Latencies in milliseconds
+    def get_summary(self):
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            summary = {"requests": self.requests, "samples": self.samples, "batches": self.batches,
+                       "mean_batch_size": self.samples / self.batches if self.batches else 0}
+        if len(latencies) > 0:
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            summary.update({"p50_ms": p50, "p90_ms": p90, "p99_ms": p99, "max_ms": latencies.max()})
+        return summary
+
+
+# Requests to the same model are grouped into micro-batches predicted with a single model.predict call.
+# A batch is closed when it reaches max_batch samples or max_delay seconds after its first request
+class MicroBatcher:
+
+    def __init__(self, model, max_batch, max_delay):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats = LatencyStats()
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # X must be a 2D array with the model vars as columns
+    def predict(self, X):
+        future = Future()
+        self.queue.put((time.perf_counter(), X, future))
+        return future.result()
+
+    # If the batch can't be predicted, its requests are predicted one by one, so only the requests that
+    # fail get an error
+    def predict_batch(self, batch):
+        try:
+            y = self.model.predict(np.concatenate([X for _, X, _ in batch]))
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][2].set_exception(e)
+            else:
+                for item in batch:
+                    self.predict_batch([item])
+            return
+        end = time.perf_counter()
+        for (_, _, future), y_request in zip(batch, np.split(y, np.cumsum([len(X) for _, X, _ in batch])[:-1])):
+            future.set_result(y_request)
+        self.stats.record_batch([end - start for start, _, _ in batch], len(y))
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            n_samples = len(item[1])
+            deadline = item[0] + self.max_delay
+            while n_samples < self.max_batch:
+                try:
+                    item = self.queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                n_samples += len(item[1])
+            self.predict_batch(batch)
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,20 @@
+import numpy as np
+
+
+# Samples as a 2D array with x_vars columns. X can be an array of samples (columns in x_vars order), a
+# single sample or a mapping from var names to values (e.g. a dict or a pandas DataFrame). Values must be
+# finite numbers
+def get_var_values(x_vars, X):
+    if hasattr(X, "keys"):
+        missing = [var for var in x_vars if var not in X]
+        if missing:
+            raise ValueError(f"Missing values of vars {missing}")
+        X = np.column_stack([np.asarray(X[var], dtype=np.float64).reshape(-1) for var in x_vars])
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.ndim != 2 or X.shape[1] != len(x_vars):
+        raise ValueError(f"Expected {len(x_vars)} columns ({x_vars}), got shape {X.shape}")
+    if not np.isfinite(X).all():
+        raise ValueError("Values must be finite numbers")
+    return X
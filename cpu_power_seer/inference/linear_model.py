@@ -0,0 +1,97 @@
+import json
+import numpy as np
+
+from cpu_power_seer.inference.inputs import get_var_values
+
+# Coefficient-only artifacts of linear-family models (polynomial and freqwointeractionterms). Power is
+# predicted as intercept + sum(coef_k * prod(var_i ** exponent_ki)), so predicting only needs NumPy (this
+# module must not import scikit-learn)
+ARTIFACT_FORMAT = "powerseer-linear"
+ARTIFACT_VERSION = 1
+
+
+# Same names as generate_monomials: var, var² and var×var
+def get_monomial_name(x_vars, exponents):
+    factors = []
+    for var, exponent in zip(x_vars, exponents):
+        if exponent == 1:
+            factors.append(var)
+        elif exponent == 2:
+            factors.append(f"{var}²")
+        elif exponent > 2:
+            factors.append(f"{var}^{exponent}")
+    return "×".join(factors) if factors else "1"
+
+
+class LinearPowerModel:
+
+    def __init__(self, x_vars, exponents, coefficients, intercept, method=None):
+        self.x_vars = [str(var) for var in x_vars]
+        self.exponents = np.asarray(exponents, dtype=np.int64).reshape(-1, len(self.x_vars))
+        self.coefficients = np.asarray(coefficients, dtype=np.float64).reshape(-1)
+        self.intercept = float(intercept)
+        self.method = method
+        if len(self.exponents) != len(self.coefficients):
+            raise ValueError(f"Number of monomials ({len(self.exponents)}) doesn't match number of "
+                             f"coefficients ({len(self.coefficients)})")
+        if (self.exponents < 0).any():
+            raise ValueError("Monomial exponents must be non-negative")
+        self.max_degree = int(self.exponents.max()) if self.exponents.size > 0 else 0
+
+    def get_monomials(self):
+        return [get_monomial_name(self.x_vars, exponents) for exponents in self.exponents]
+
+    # Powers of each var are computed once and every monomial is the product of the powers of its vars
+    def predict(self, X):
+        X = get_var_values(self.x_vars, X)
+        powers = np.ones((self.max_degree + 1,) + X.shape)
+        for degree in range(1, self.max_degree + 1):
+            np.multiply(powers[degree - 1], X, out=powers[degree])
+        terms = np.ones((X.shape[0], len(self.coefficients)))
+        for i in range(len(self.x_vars)):
+            terms *= powers[self.exponents[:, i], :, i].T
+        return terms @ self.coefficients + self.intercept
+
+    def to_dict(self):
+        return {
+            "format": ARTIFACT_FORMAT,
+            "version": ARTIFACT_VERSION,
+            "method": self.method,
+            "vars": self.x_vars,
+            "monomials": self.get_monomials(),
+            "exponents": self.exponents.tolist(),
+            "coefficients": self.coefficients.tolist(),
+            "intercept": self.intercept
+        }
+
+    # JSON or NPZ depending on file extension
+    def save(self, path):
+        if path.endswith(".npz"):
+            np.savez(path, format=ARTIFACT_FORMAT, version=ARTIFACT_VERSION, method=str(self.method),
+                     vars=np.array(self.x_vars, dtype=str), exponents=self.exponents,
+                     coefficients=self.coefficients, intercept=self.intercept)
+        else:
+            with open(path, 'w', encoding="utf-8") as file:
+                json.dump(self.to_dict(), file, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != ARTIFACT_FORMAT or int(data.get("version", 0)) > ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported artifact format: {data.get('format')} (version {data.get('version')})")
+        return cls(data["vars"], data["exponents"], data["coefficients"], data["intercept"], data.get("method"))
+
+
+def load_linear_model(path):
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return LinearPowerModel.from_dict({
+                "format": str(data["format"]),
+                "version": int(data["version"]),
+                "method": str(data["method"]),
+                "vars": [str(var) for var in data["vars"]],
+                "exponents": data["exponents"],
+                "coefficients": data["coefficients"],
+                "intercept": float(data["intercept"])
+            })
+    with open(path, 'r', encoding="utf-8") as file:
+        return LinearPowerModel.from_dict(json.load(file))
@@ -0,0 +1,41 @@
+import numpy as np
+
+from cpu_power_seer.inference.inputs import get_var_values
+
+ARTIFACT_FORMAT = "powerseer-pipeline"
+ARTIFACT_VERSION = 1
+
+
+# Complete model artifact: preprocessing steps (feature expansion, scaling...) applied to raw vars in
+# x_vars order, followed by the estimator. Predictions are the same as the ones obtained when testing
+class PipelineModel:
+
+    def __init__(self, x_vars, steps, estimator, method=None, metadata=None):
+        self.format = ARTIFACT_FORMAT
+        self.version = ARTIFACT_VERSION
+        self.x_vars = list(x_vars)
+        self.steps = list(steps)
+        self.estimator = estimator
+        self.method = method
+        self.metadata = metadata or {}
+
+    def transform(self, X):
+        X = get_var_values(self.x_vars, X)
+        for step in self.steps:
+            X = step.transform(X)
+        return X
+
+    def predict(self, X):
+        return np.ravel(self.estimator.predict(self.transform(X)))
+
+
+# Load a model stored by save_model. With mmap_mode (by default read-only) arrays such as coefficients or
+# support vectors are memory-mapped instead of read, so loading is fast and processes loading the same
+# file share their pages. Use mmap_mode=None to read the whole model into memory. joblib is only imported
+# here, so loading coefficient-only models from this package doesn't take its import time
+def load_model(path, mmap_mode="r"):
+    from joblib import load
+    model = load(path, mmap_mode=mmap_mode)
+    if not isinstance(model, PipelineModel) or model.version > ARTIFACT_VERSION:
+        raise ValueError(f"{path} doesn't contain a supported model artifact")
+    return model
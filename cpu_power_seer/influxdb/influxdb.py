@@ -1,41 +1,143 @@
+import os
 import warnings
+import threading
 from influxdb_client import InfluxDBClient
+from influxdb_client.client.write_api import SYNCHRONOUS
 from influxdb_client.client.warnings import MissingPivotFunction
 from urllib3.exceptions import ReadTimeoutError
 
+from cpu_power_seer.config import config
 from cpu_power_seer.influxdb.influxdb_env import INFLUXDB_URL, INFLUXDB_TOKEN, INFLUXDB_ORG
+from cpu_power_seer.influxdb.influxdb_queries import format_query
+from cpu_power_seer.influxdb.influxdb_stream import decode_csv_stream, STREAM_DIALECT
 from cpu_power_seer.logs.logger import log
 
 warnings.simplefilter("ignore", MissingPivotFunction)
 
+DEFAULT_WINDOW = "2s"
+DEFAULT_TIMEOUT = 10  # seconds
+
+# Process-wide client shared by all threads. Its HTTP connection pool keeps connections alive between queries
+client = None
+client_lock = threading.Lock()
+query_stats = {"queries": 0, "active": 0, "peak_active": 0}
+
+
+# Same default size as ThreadPoolExecutor so that each worker thread can keep its own connection
+def get_default_pool_size():
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def get_client():
+    global client
+    with client_lock:
+        if client is None:
+            timeout = config.influxdb_timeout if config.influxdb_timeout is not None else DEFAULT_TIMEOUT
+            pool_size = config.influxdb_pool_size if config.influxdb_pool_size is not None else get_default_pool_size()
+            client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG,
+                                    timeout=int(timeout * 1000), connection_pool_maxsize=pool_size)
+        return client
+
+
+# Connection pools are read from urllib3 internals (there is no public API for them), so pools are None
+# if they can't be read (e.g. with other urllib3 or influxdb-client versions)
+def get_pool_stats():
+    pools = []
+    if client is not None:
+        try:
+            pool_manager = client.api_client.rest_client.pool_manager
+            for key in pool_manager.pools.keys():
+                pool = pool_manager.pools.get(key)
+                if pool is None:
+                    continue
+                pools.append({
+                    "host": f"{pool.host}:{pool.port}",
+                    "max_size": pool.pool.maxsize,
+                    "opened_connections": pool.num_connections,
+                    "idle_connections": sum(1 for conn in list(pool.pool.queue) if conn is not None),
+                    "requests": pool.num_requests,
+                })
+        except Exception:
+            pools = None
+    return {**query_stats, "pools": pools}
+
+
+def log_pool_stats():
+    stats = get_pool_stats()
+    log(f"INFLUXDB QUERIES: {stats['queries']} (Max concurrent queries: {stats['peak_active']})")
+    if stats["pools"] is None:
+        log("INFLUXDB CONNECTION POOL: statistics not available with this urllib3 version")
+        return
+    for pool in stats["pools"]:
+        log(f"INFLUXDB CONNECTION POOL ({pool['host']}): {pool['opened_connections']} opened connections, "
+            f"{pool['idle_connections']} idle connections, {pool['requests']} requests (Max size: {pool['max_size']})")
+
+
+# Close shared client (and its connections). A new client will be created if InfluxDB is queried again
+def close_client(print_stats=False):
+    global client
+    with client_lock:
+        if client is None:
+            return
+        if print_stats:
+            log_pool_stats()
+        client.close()
+        client = None
+
+
+def update_query_stats(active_delta):
+    with client_lock:
+        query_stats["active"] += active_delta
+        if active_delta > 0:
+            query_stats["queries"] += 1
+            query_stats["peak_active"] = max(query_stats["peak_active"], query_stats["active"])
+
 
 def check_bucket_exists(bucket_name):
-    client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
-    buckets_api = client.buckets_api()
+    buckets_api = get_client().buckets_api()
     if buckets_api.find_bucket_by_name(bucket_name) is None:
         log(f"Specified bucket {bucket_name} doesn't exists", "ERR")
         exit(1)
 
 
-def query_influxdb(query, start_date, stop_date, bucket):
+# If columns are specified results are streamed and only _time and those columns are kept
+def read_query(query_api, query, columns):
+    if columns is None:
+        return query_api.query_data_frame(query)
+    return decode_csv_stream(query_api.query_csv(query, dialect=STREAM_DIALECT), columns)
+
+
+# Raised when a query fails or times out after all retries, so callers decide whether to exit or retry later
+class InfluxDBQueryError(Exception):
+    pass
+
+
+def query_influxdb(query, start_date, stop_date, bucket, window=DEFAULT_WINDOW, columns=None):
     retry = 3
-    client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
-    query_api = client.query_api()
-    query = query.format(start_date=start_date, stop_date=stop_date, influxdb_bucket=bucket, influxdb_window="2s")
-    while retry != 0:
+    query_api = get_client().query_api()
+    query = format_query(query, start_date, stop_date, bucket, window)
+    while True:
+        update_query_stats(1)
         try:
-            result = query_api.query_data_frame(query)
-        except ReadTimeoutError:
-            if retry != 0:
-                log(f"InfluxDB query has timed out (start_date = {start_date}, stop_date = {stop_date}). Retrying", "WARN")
-                retry -= 1
-            else:
-                log(f"InfluxDB query has timed out (start_date = {start_date}, stop_date = {stop_date}). No more tries", "ERR")
+            return read_query(query_api, query, columns)
+        except ReadTimeoutError as e:
+            retry -= 1
+            if retry == 0:
+                raise InfluxDBQueryError(f"InfluxDB query has timed out (start_date = {start_date}, "
+                                         f"stop_date = {stop_date}). No more tries") from e
+            log(f"InfluxDB query has timed out (start_date = {start_date}, stop_date = {stop_date}). Retrying", "WARN")
         except Exception as e:
-            log(f"Unexpected error while querying InfluxDB (start_date = {start_date}, stop_date = {stop_date}).", "ERR")
-            log(f"{e}", "ERR")
-            exit(1)
-        else:
-            retry = 0
+            raise InfluxDBQueryError(f"Unexpected error while querying InfluxDB (start_date = {start_date}, "
+                                     f"stop_date = {stop_date}): {e}") from e
+        finally:
+            update_query_stats(-1)
+
 
-    return result
+# Write records (line protocol) with a single request. Returns False if they couldn't be written
+def write_influxdb(records, bucket):
+    try:
+        get_client().write_api(write_options=SYNCHRONOUS).write(bucket=bucket, record=records)
+    except Exception as e:
+        log(f"Unexpected error while writing {len(records)} records to InfluxDB bucket {bucket}: {e}", "WARN")
+        return False
+    return True
@@ -0,0 +1,54 @@
+import asyncio
+
+from cpu_power_seer.config import config
+from cpu_power_seer.influxdb.influxdb_env import INFLUXDB_URL, INFLUXDB_TOKEN, INFLUXDB_ORG
+from cpu_power_seer.influxdb.influxdb_queries import format_query
+from cpu_power_seer.influxdb.influxdb import get_default_pool_size, update_query_stats, DEFAULT_WINDOW, DEFAULT_TIMEOUT, \
+    InfluxDBQueryError
+from cpu_power_seer.influxdb.influxdb_stream import decode_record_stream
+from cpu_power_seer.logs.logger import log
+
+
+# Async client needs aiohttp, which is an optional dependency (pip install influxdb-client[async])
+def async_client_available():
+    try:
+        from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+    except ImportError:
+        return False
+    return True
+
+
+# Async client must be created inside a running event loop
+def create_async_client():
+    from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+    timeout = config.influxdb_timeout if config.influxdb_timeout is not None else DEFAULT_TIMEOUT
+    pool_size = config.influxdb_pool_size if config.influxdb_pool_size is not None else get_default_pool_size()
+    return InfluxDBClientAsync(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG,
+                               timeout=int(timeout * 1000), connection_pool_maxsize=pool_size)
+
+
+# If columns are specified results are streamed and only _time and those columns are kept
+async def read_query_async(query_api, query, columns):
+    if columns is None:
+        return await query_api.query_data_frame(query)
+    return await decode_record_stream(await query_api.query_stream(query), columns)
+
+
+async def query_influxdb_async(query_api, query, start_date, stop_date, bucket, window=DEFAULT_WINDOW, columns=None):
+    retry = 3
+    query = format_query(query, start_date, stop_date, bucket, window)
+    while True:
+        update_query_stats(1)
+        try:
+            return await read_query_async(query_api, query, columns)
+        except asyncio.TimeoutError as e:
+            retry -= 1
+            if retry == 0:
+                raise InfluxDBQueryError(f"InfluxDB query has timed out (start_date = {start_date}, "
+                                         f"stop_date = {stop_date}). No more tries") from e
+            log(f"InfluxDB query has timed out (start_date = {start_date}, stop_date = {stop_date}). Retrying", "WARN")
+        except Exception as e:
+            raise InfluxDBQueryError(f"Unexpected error while querying InfluxDB (start_date = {start_date}, "
+                                     f"stop_date = {stop_date}): {e}") from e
+        finally:
+            update_query_stats(-1)
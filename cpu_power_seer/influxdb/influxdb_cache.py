@@ -0,0 +1,160 @@
+import os
+import time
+import hashlib
+import threading
+import pandas as pd
+
+from cpu_power_seer.config import config
+from cpu_power_seer.logs.logger import log
+
+# Increase it when the stored format changes to invalidate previous cache entries
+CACHE_VERSION = "1"
+CACHE_EXTENSION = ".parquet"
+
+cache_lock = threading.Lock()
+cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+# Cache entries {path: [modification time, size]} of cache_index_dir and their total size, scanned on the
+# first write and then updated on each read, write and eviction
+cache_index = None
+cache_index_dir = None
+cache_size = 0
+
+
+# Cache entries are stored as <cache_dir>/<bucket>/<key>.parquet
+def get_cache_key(query, start_date, stop_date, bucket, window):
+    key = hashlib.sha256()
+    for part in (CACHE_VERSION, bucket, window, start_date, stop_date, query):
+        key.update(part.encode())
+        key.update(b"\0")
+    return key.hexdigest()
+
+
+def get_cache_path(key, bucket):
+    return os.path.join(config.cache_dir, bucket, f"{key}{CACHE_EXTENSION}")
+
+
+def bucket_is_cached(bucket):
+    bucket_dir = os.path.join(config.cache_dir, bucket)
+    return os.path.isdir(bucket_dir) and any(f.endswith(CACHE_EXTENSION) for f in os.listdir(bucket_dir))
+
+
+def read_cache(path):
+    try:
+        df = pd.read_parquet(path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log(f"Corrupted cache entry {path} will be refreshed: {e}", "WARN")
+        return None
+    # Mark entry as recently used (LRU eviction is based on modification time)
+    try:
+        os.utime(path)
+    except OSError:
+        return df
+    with cache_lock:
+        if cache_index is not None and path in cache_index:
+            cache_index[path][0] = time.time()
+    return df
+
+
+def write_cache(path, df):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        log(f"Error while writing cache entry {path}: {e}", "WARN")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return
+    with cache_lock:
+        load_cache_index()
+        update_cache_index(path, st.st_mtime, st.st_size)
+        evict_cache()
+
+
+# Scan cache_dir once (cache_lock must be held)
+def load_cache_index():
+    global cache_index, cache_index_dir, cache_size
+    if cache_index is not None and cache_index_dir == config.cache_dir:
+        return
+    cache_index, cache_index_dir, cache_size = {}, config.cache_dir, 0
+    for root, _, files in os.walk(config.cache_dir):
+        for f in files:
+            if f.endswith(CACHE_EXTENSION):
+                path = os.path.join(root, f)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                update_cache_index(path, st.st_mtime, st.st_size)
+
+
+# Add or replace an entry (cache_lock must be held)
+def update_cache_index(path, mtime, size):
+    global cache_size
+    previous = cache_index.get(path)
+    cache_size += size - (previous[1] if previous is not None else 0)
+    cache_index[path] = [mtime, size]
+
+
+# Remove least recently used entries until cache size is below the maximum size (cache_lock must be held).
+# Entries are only sorted when the cache is full
+def evict_cache():
+    global cache_size
+    max_size = config.cache_max_size * 1024 * 1024
+    if cache_size <= max_size:
+        return
+    for path, (_, size) in sorted(cache_index.items(), key=lambda entry: entry[1][0]):
+        if cache_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        else:
+            cache_stats["evictions"] += 1
+        del cache_index[path]
+        cache_size -= size
+
+
+def count(stat):
+    with cache_lock:
+        cache_stats[stat] += 1
+
+
+# Get query results from cache. Returns entry path (to store results later) and
+# cached results (None if they must be queried)
+def get_cached(query, start_date, stop_date, bucket, window):
+    path = get_cache_path(get_cache_key(query, start_date, stop_date, bucket, window), bucket)
+    if config.cache_mode == "use":
+        df = read_cache(path)
+        if df is not None:
+            count("hits")
+            return path, df
+    count("misses")
+    return path, None
+
+
+# Get query results from cache if possible, otherwise run fetch() and store its results
+def cached_query(fetch, query, start_date, stop_date, bucket, window):
+    if config.cache_mode == "bypass":
+        return fetch()
+    path, df = get_cached(query, start_date, stop_date, bucket, window)
+    if df is None:
+        df = fetch()
+        write_cache(path, df)
+    return df
+
+
+def log_cache_stats():
+    if config.cache_mode == "bypass":
+        return
+    log(f"INFLUXDB CACHE HITS: {cache_stats['hits']}")
+    log(f"INFLUXDB CACHE MISSES: {cache_stats['misses']}")
+    log(f"INFLUXDB CACHE EVICTIONS: {cache_stats['evictions']}")
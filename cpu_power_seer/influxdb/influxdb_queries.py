@@ -1,10 +1,23 @@
+import re
+
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+# Get seconds from a simple Flux duration literal (e.g. "2s", "1m30s")
+def parse_duration(duration):
+    parts = re.findall(r"(\d+)(ms|s|m|h|d)", duration)
+    if not parts or "".join(value + unit for value, unit in parts) != duration:
+        raise ValueError(f"Invalid duration: {duration}")
+    return sum(float(value) * DURATION_UNITS[unit] for value, unit in parts)
+
+
 load_query = '''
     from(bucket: "{influxdb_bucket}")
         |> range(start: {start_date}, stop: {stop_date})
         |> filter(fn: (r) => r["_measurement"] == "percpu")
         |> filter(fn: (r) => r["_field"] == "user" or r["_field"] == "system")
         |> aggregateWindow(every: {influxdb_window}, fn: mean, createEmpty: false)
-        |> timeShift(duration: -6s)
+        |> timeShift(duration: {load_time_shift})
         |> group(columns: ["_measurement"])
         |> aggregateWindow(every: {influxdb_window}, fn: sum, createEmpty: false)'''
 
@@ -14,7 +27,7 @@ user_load_query = '''
         |> filter(fn: (r) => r["_measurement"] == "percpu")
         |> filter(fn: (r) => r["_field"] == "user" )
         |> aggregateWindow(every: {influxdb_window}, fn: mean, createEmpty: false)
-        |> timeShift(duration: -6s)
+        |> timeShift(duration: {load_time_shift})
         |> group(columns: ["_measurement"])
         |> aggregateWindow(every: {influxdb_window}, fn: sum, createEmpty: false)'''
 
@@ -24,7 +37,7 @@ system_load_query = '''
         |> filter(fn: (r) => r["_measurement"] == "percpu")
         |> filter(fn: (r) => r["_field"] == "system" )
         |> aggregateWindow(every: {influxdb_window}, fn: mean, createEmpty: false)
-        |> timeShift(duration: -6s)
+        |> timeShift(duration: {load_time_shift})
         |> group(columns: ["_measurement"])
         |> aggregateWindow(every: {influxdb_window}, fn: sum, createEmpty: false)'''
 
@@ -34,7 +47,7 @@ wait_load_query = '''
         |> filter(fn: (r) => r["_measurement"] == "percpu")
         |> filter(fn: (r) => r["_field"] == "iowait" )
         |> aggregateWindow(every: {influxdb_window}, fn: mean, createEmpty: false)
-        |> timeShift(duration: -6s)
+        |> timeShift(duration: {load_time_shift})
         |> group(columns: ["_measurement"])
         |> aggregateWindow(every: {influxdb_window}, fn: sum, createEmpty: false)'''
 
@@ -96,4 +109,47 @@ var_query = {
     "sumfreq": sumfreq_query,
     "power": power_query,
     "temp": temp_query
-}
\ No newline at end of file
+}
+
+# Time shift (seconds backwards) applied by each var query with 2s windows. Other windows use the nearest
+# multiple of the window (see get_time_shift)
+var_time_shift = {
+    "load": 6,
+    "user_load": 6,
+    "system_load": 6,
+    "wait_load": 6,
+    "freq": 0,
+    "sumfreq": 0,
+    "power": 0,
+    "temp": 0
+}
+
+
+# Time shift (seconds backwards) of a var query with the given window (seconds). Shifts are rounded to a whole
+# number of windows, so shifted windows stay aligned with the windows of the other vars
+def get_time_shift(var, window):
+    return int(var_time_shift[var] / window + 0.5) * window
+
+
+# Fill query placeholders. Load queries are shifted according to the window
+def format_query(query, start_date, stop_date, bucket, window):
+    load_time_shift = get_time_shift("load", parse_duration(window))
+    return query.format(start_date=start_date, stop_date=stop_date, influxdb_bucket=bucket, influxdb_window=window,
+                        load_time_shift=f"-{round(load_time_shift * 1000)}ms")
+
+# Build a single query retrieving all the specified vars at once. Each var query is
+# computed as a separate table, then all of them are joined in one table with one
+# column per var (rows indexed by _time)
+def build_vars_query(_vars):
+    var_tables = "".join(
+        f'''
+    var_{var} = {var_query[var].strip()}
+        |> map(fn: (r) => ({{{{_time: r._time, _value: r._value, _field: "{var}"}}}}))
+'''
+        for var in _vars)
+    tables_list = ", ".join(f"var_{var}" for var in _vars)
+    return f'''{var_tables}
+    union(tables: [{tables_list}])
+        |> group()
+        |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+        |> sort(columns: ["_time"])'''
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from influxdb_client import Dialect
+
+STREAM_CHUNK_SIZE = 10000
+
+# Plain CSV (no annotations): each table starts with its header row
+STREAM_DIALECT = Dialect(header=True, annotations=[])
+
+
+# Decode query results into compact typed arrays, one chunk at a time. Only _time and the specified
+# columns are kept, so Influx metadata columns are never stored
+class ChunkedFrameDecoder:
+
+    def __init__(self, columns, chunk_size=STREAM_CHUNK_SIZE):
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.seen_columns = set()
+        self.times = []
+        self.values = [[] for _ in columns]
+        self.time_chunks = []
+        self.value_chunks = []
+
+    def add_columns(self, names):
+        if len(self.seen_columns) < len(self.columns):
+            self.seen_columns.update(name for name in names if name in self.columns)
+
+    def append(self, time, values):
+        self.times.append(time)
+        for column_values, value in zip(self.values, values):
+            column_values.append(value)
+        if len(self.times) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.times:
+            return
+        times = pd.to_datetime(self.times, utc=True).as_unit("ns").asi8
+        values = np.empty((len(self.times), len(self.columns)), dtype=np.float64)
+        for j, column_values in enumerate(self.values):
+            values[:, j] = pd.to_numeric(np.asarray(column_values, dtype=object), errors="coerce")
+        self.time_chunks.append(times)
+        self.value_chunks.append(values)
+        self.times = []
+        self.values = [[] for _ in self.columns]
+
+    def to_frame(self):
+        self.flush()
+        present_columns = [column for column in self.columns if column in self.seen_columns]
+        if not self.time_chunks:
+            return pd.DataFrame(columns=["_time"] + present_columns)
+        times = np.concatenate(self.time_chunks)
+        values = np.concatenate(self.value_chunks)
+        data = {"_time": pd.to_datetime(times, utc=True)}
+        for j, column in enumerate(self.columns):
+            if column in self.seen_columns:
+                data[column] = values[:, j]
+        return pd.DataFrame(data)
+
+
+# Decode rows from QueryApi.query_csv (using STREAM_DIALECT). Tables are separated by empty rows
+def decode_csv_stream(rows, columns):
+    decoder = ChunkedFrameDecoder(columns)
+    header = None
+    for row in rows:
+        if not row or all(value == "" for value in row):
+            header = None
+            continue
+        if header is None or row == header:
+            header = row
+            positions = {name: i for i, name in enumerate(row)}
+            decoder.add_columns(row)
+            time_position = positions.get("_time")
+            value_positions = [positions.get(column) for column in columns]
+            continue
+        # Tables without time (e.g. errors) are ignored
+        if time_position is None:
+            continue
+        decoder.append(row[time_position], [row[p] if p is not None else None for p in value_positions])
+    return decoder.to_frame()
+
+
+# Decode records from QueryApiAsync.query_stream
+async def decode_record_stream(records, columns):
+    decoder = ChunkedFrameDecoder(columns)
+    async for record in records:
+        decoder.add_columns(record.values.keys())
+        decoder.append(record.values.get("_time"), [record.values.get(column) for column in columns])
+    return decoder.to_frame()
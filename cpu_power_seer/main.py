@@ -1,11 +1,36 @@
+import sys
 import time
 
 from cpu_power_seer import utils
 from cpu_power_seer.logs.logger import log
+from cpu_power_seer.datasource.sources import close_data_source
+from cpu_power_seer.config import config
+from cpu_power_seer.data.process.alignment import log_alignment_stats
+from cpu_power_seer.data.plot.jobs import wait_plots, log_plot_stats
 
 
 def main():
 
+    # Batch sweep from a manifest (powerseer sweep MANIFEST)
+    if len(sys.argv) > 1 and sys.argv[1] == "sweep":
+        utils.sweep.run(sys.argv[2:])
+        return
+
+    # Prediction server with trained models (powerseer serve MODEL...)
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        utils.serve.run(sys.argv[2:])
+        return
+
+    # Real-time power estimation with a trained model (powerseer stream MODEL)
+    if len(sys.argv) > 1 and sys.argv[1] == "stream":
+        utils.stream.run(sys.argv[2:])
+        return
+
+    # Render plots saved with --no-plots (powerseer plot OUTPUT...)
+    if len(sys.argv) > 1 and sys.argv[1] == "plot":
+        utils.render_plots.run(sys.argv[2:])
+        return
+
     start = time.time()
     start_cpu = time.process_time()
 
@@ -22,23 +47,34 @@ def main():
 
     # Train model
     start_train = time.time()
-    reg_model = utils.train_model.run(train_timestamps, time_series)
+    reg_models = utils.train_model.run(train_timestamps, time_series)
     end_train = time.time()
 
     # Test model
     start_test = time.time()
-    utils.test_model.run(reg_model)
+    utils.test_model.run(reg_models)
     end_test = time.time()
 
+    # Wait for plots rendered in background
+    end_no_plots = time.time()
+    plot_stats = wait_plots()
+
     end = time.time()
     end_cpu = time.process_time()
+    # Plots rendered in the main process are also excluded
+    no_plots_time = end_no_plots - start - (plot_stats["render_time"] if config.plot_workers == 0 else 0)
 
     # Execution times
     log(f"TRAIN DATA GATHERING EXECUTION TIME: {end_gather - start_gather}")
     log(f"MODEL TRAINING EXECUTION TIME: {end_train - start_train}")
     log(f"MODEL TESTING EXECUTION TIME: {end_test - start_test}")
+    log_plot_stats(plot_stats)
+    log(f"PLOT WAITING TIME: {end - end_no_plots}")
     log(f"TOTAL CPU TIME: {end_cpu - start_cpu}")
+    log(f"TOTAL EXECUTION TIME WITHOUT PLOTS: {no_plots_time}")
     log(f"TOTAL EXECUTION TIME: {end - start}")
+    log_alignment_stats()
+    close_data_source()
 
 
 if __name__ == '__main__':
@@ -4,7 +4,11 @@ from argparse import RawTextHelpFormatter
 
 from cpu_power_seer.logs.logger import log
 from cpu_power_seer.config import config
-from cpu_power_seer.influxdb.influxdb import check_bucket_exists
+from cpu_power_seer.influxdb.influxdb import get_default_pool_size, DEFAULT_TIMEOUT, DEFAULT_WINDOW
+from cpu_power_seer.influxdb.influxdb_queries import parse_duration
+from cpu_power_seer.influxdb.influxdb_async import async_client_available
+from cpu_power_seer.datasource.sources import get_data_source
+from cpu_power_seer.data.plot.downsample import MIN_POINTS as MIN_PLOT_POINTS
 
 
 def create_parser():
@@ -45,15 +49,97 @@ and power to test\nthe model (in same format as train timestamps). If any file i
 into train and test data.",
     )
 
+    parser.add_argument(
+        "--plot-workers",
+        type=int,
+        default=None,
+        help="Number of background worker processes rendering plots while models are trained and tested.\n\
+Use 0 to render them from the main process. By default is the number of CPUs.",
+    )
+
+    parser.add_argument(
+        "--no-plots",
+        action="store_true",
+        help="Don't render plots. Their data is saved to <OUTPUT>/plots to render them later with powerseer plot.",
+    )
+
+    parser.add_argument(
+        "--plot-points",
+        type=int,
+        default=2000,
+        help="Maximum number of points of time series line plots. Longer time series are downsampled keeping the\n\
+minimum and maximum of each bucket of samples. Use 0 to plot all samples. By default is 2000.",
+    )
+
+    parser.add_argument(
+        "--plot-density-points",
+        type=int,
+        default=10000,
+        help="Number of test samples above which expected VS predicted plots show their density (2D histogram) and\n\
+quantiles of residuals instead of every sample. Use 0 to always show every sample. By default is 10000.",
+    )
+
     parser.add_argument(
         "-p",
         "--prediction-method",
         default="polynomial",
-        help="Method used to predict CPU power consumption. By default is a polynomial regression. Supported methods:\n\
+        help="Comma-separated list of methods used to predict CPU power consumption or 'all' to use every supported method.\n\
+By default is a polynomial regression. When several methods are specified data is retrieved once and models are\n\
+trained in parallel (results of each method are stored in its own subdirectory of output directory). Supported methods:\n\
 \tpolynomial\t\t\tPolynomial Regression with specified variables\n\
 \tfreqwointeractionterms\t\tCustom Regression using user_load, system_load and freq or sumfreq\n\
 \tperceptron\t\t\tMultilayer Perceptron\n\
-\tsvr\t\t\t\tSupport Vector Regression",
+\tsvr\t\t\t\tSupport Vector Regression\n\
+\tsvrnystroem\t\t\tSupport Vector Regression with kernel approximated by Nystroem method (scalable)\n\
+\tsvrsketch\t\t\tSupport Vector Regression with kernel approximated by polynomial count sketch (scalable)\n\
+\tsvrsubsample\t\t\tSupport Vector Regression trained with a stratified subsample of train data (scalable)",
+    )
+
+    parser.add_argument(
+        "--search-mode",
+        default="grid",
+        help="Hyperparameter search used by perceptron method. By default is 'grid'. Supported modes:\n\
+\tgrid\t\t\t\tEvery configuration is evaluated by cross-validation\n\
+\trandom\t\t\t\tRandomly sampled configurations are evaluated (as many as search budget allows)\n\
+\thalving\t\t\t\tSuccessive halving: sampled configurations are evaluated with few samples and only the best\n\
+\t\t\t\t\tones are evaluated again with more samples",
+    )
+
+    parser.add_argument(
+        "--search-budget",
+        type=int,
+        default=500,
+        help="Maximum number of fits (configurations x folds) of random and halving searches. By default is 500.",
+    )
+
+    parser.add_argument(
+        "--search-time",
+        type=float,
+        default=None,
+        help="Time budget (seconds) of hyperparameter search. Pending fits are skipped once it is exceeded. \
+By default there is no\ntime limit.",
+    )
+
+    parser.add_argument(
+        "--svr-components",
+        type=int,
+        default=500,
+        help="Number of features used to approximate SVR kernel (svrnystroem and svrsketch methods). By default is 500.",
+    )
+
+    parser.add_argument(
+        "--svr-sample-budget",
+        type=int,
+        default=10000,
+        help="Maximum number of train samples used by svrsubsample method. By default is 10000.",
+    )
+
+    parser.add_argument(
+        "--merge-stats",
+        default=None,
+        help="Comma-separated list of least squares statistics files (<method>-stats.npz saved in train directory) from \
+other\ntrainings (e.g. other campaigns or nodes) to merge with train data. Only for polynomial and \
+freqwointeractionterms methods.",
     )
 
     parser.add_argument(
@@ -70,6 +156,13 @@ into train and test data.",
         help="Directory to save time series plots and results. By default is './out'.",
     )
 
+    parser.add_argument(
+        "--results-format",
+        default="csv",
+        help="Format of the results table (metrics of every method, test and threads). By default is 'csv'.\n\
+Supported formats: csv, parquet and json.",
+    )
+
     parser.add_argument(
         "-n",
         "--name",
@@ -78,6 +171,414 @@ into train and test data.",
 in an orderly manner. By default is 'General'",
     )
 
+    parser.add_argument(
+        "-s",
+        "--source",
+        default="influxdb",
+        help="Source of the time series. By default is 'influxdb'. Supported sources:\n\
+\tinfluxdb\t\t\tInfluxDB server from influxdb_env.py\n\
+\tlocal\t\t\t\tLine protocol (.lp, .line, .txt) or Parquet exports of the InfluxDB measurements stored in the \
+data directory",
+    )
+
+    parser.add_argument(
+        "-d",
+        "--data-dir",
+        default=None,
+        help="Directory storing InfluxDB exports when using local source. If it has a subdirectory named as the \
+bucket only\nthat subdirectory is used.",
+    )
+
+    parser.add_argument(
+        "--window",
+        default=DEFAULT_WINDOW,
+        help=f"Aggregation window of time series as a Flux duration (e.g. 2s, 10s, 1m) or 'auto' to choose it from \
+the\nlength of the train periods and the row budget (test periods use the same window). Load variables are shifted \
+6s\nback, rounded to whole windows. By default is '{DEFAULT_WINDOW}'.",
+    )
+
+    parser.add_argument(
+        "--row-budget",
+        type=int,
+        default=100000,
+        help="Maximum number of rows (per variable) retrieved when using 'auto' window. By default is 100000.",
+    )
+
+    parser.add_argument(
+        "--influxdb-timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f"Timeout (seconds) of InfluxDB requests. By default is {DEFAULT_TIMEOUT}.",
+    )
+
+    parser.add_argument(
+        "--influxdb-pool-size",
+        type=int,
+        default=get_default_pool_size(),
+        help="Maximum number of HTTP connections kept alive to the InfluxDB server. \
+By default is min(32, CPUs + 4) (one per data retrieval thread).",
+    )
+
+    parser.add_argument(
+        "--fetch-backend",
+        default="threads",
+        help="Backend used to retrieve time series from InfluxDB. By default is 'threads'. Supported backends:\n\
+\tthreads\t\t\t\tOne thread per concurrent query\n\
+\tasync\t\t\t\tAll queries run concurrently from a single event loop (requires influxdb-client[async])",
+    )
+
+    parser.add_argument(
+        "--fetch-concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of concurrent queries to InfluxDB. By default is the connection pool size.",
+    )
+
+    parser.add_argument(
+        "--coalesce-gap",
+        type=float,
+        default=None,
+        help="Periods from timestamps files separated by at most this number of seconds are retrieved with a single \
+query and split locally (e.g. 300). Split periods only keep their complete windows and all variables end where the \
+shifted loads end, so results may slightly differ from per-period queries. By default each period is retrieved with \
+its own query.",
+    )
+
+    parser.add_argument(
+        "--coalesce-span",
+        type=float,
+        default=21600,
+        help="Maximum duration (seconds) of the range retrieved by a single query when coalescing periods. \
+By default is 21600 (6 hours).",
+    )
+
+    parser.add_argument(
+        "--align-tolerance",
+        type=float,
+        default=0,
+        help="Maximum distance (seconds) between a power sample and the nearest sample of each variable to align them. \
+By default\nis 0 (only samples with the same time are aligned). Samples without a variable within tolerance are dropped.",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        default=os.path.join(os.path.expanduser("~"), ".cache", "powerseer"),
+        help="Directory to cache InfluxDB query results. By default is '~/.cache/powerseer'.",
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="Maximum size (MB) of the InfluxDB cache. Least recently used results are removed when it is exceeded. \
+By default is 1024.",
+    )
+
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Query InfluxDB directly without reading or writing the cache.",
+    )
+    cache_group.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Query InfluxDB directly and overwrite cached results.",
+    )
+
+    return parser
+
+
+def create_sweep_parser():
+    parser = argparse.ArgumentParser(
+        prog="powerseer sweep",
+        description="Train and test every model and combination from a sweep manifest (JSON or YAML).\n\
+Time series are retrieved once per bucket, timestamps file and vars, and runs are executed in parallel.",
+        formatter_class=RawTextHelpFormatter
+    )
+
+    parser.add_argument(
+        "manifest",
+        help="Sweep manifest file (.json, .yaml or .yml). Check README.md to see manifest format.",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Increase output verbosity",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes training and testing models. By default is the manifest 'workers' value \
+or the\nnumber of CPUs.",
+    )
+
+    parser.add_argument(
+        "--results-format",
+        default="csv",
+        help="Format of the sweep results table (metrics of every run, method, test and threads). By default is 'csv'.\n\
+Supported formats: csv, parquet and json.",
+    )
+
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Remove the contents of runs output directories that aren't empty (by default the sweep isn't started).",
+    )
+
+    return parser
+
+
+def create_serve_parser():
+    parser = argparse.ArgumentParser(
+        prog="powerseer serve",
+        description="Load trained models once and serve power predictions over HTTP (TCP or Unix socket).\n\
+Requests to the same model are micro-batched into a single prediction.",
+        formatter_class=RawTextHelpFormatter
+    )
+
+    parser.add_argument(
+        "models",
+        nargs="+",
+        help="Trained models to serve as [NAME=]PATH, where PATH is a model (.joblib) or a coefficient-only model\n\
+(.json or .npz) from the train directory. By default NAME is the file name without extension.",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Increase output verbosity",
+    )
+
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address where the server listens. By default is 127.0.0.1.",
+    )
+
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="Port where the server listens. By default is 8000.",
+    )
+
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="Unix socket where the server listens (instead of --host and --port).",
+    )
+
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=4096,
+        help="Maximum number of samples predicted in a single batch. By default is 4096.",
+    )
+
+    parser.add_argument(
+        "--max-delay",
+        type=float,
+        default=2,
+        help="Maximum time (ms) a request waits for other requests to be batched with. By default is 2.",
+    )
+
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=60,
+        help="Interval (s) between latency reports in the log. Use 0 to only report at exit. By default is 60.",
+    )
+
+    parser.add_argument(
+        "-l",
+        "--log-file",
+        default="serve.log",
+        help="File where server logs are stored. By default is ./serve.log.",
+    )
+
+    return parser
+
+
+def create_stream_parser():
+    parser = argparse.ArgumentParser(
+        prog="powerseer stream",
+        description="Estimate power in real time with a trained model from the newest samples of its variables.\n\
+Predicted power is written back in batches to InfluxDB or to a line protocol file.",
+        formatter_class=RawTextHelpFormatter
+    )
+
+    parser.add_argument(
+        "model",
+        help="Trained model (.joblib) or coefficient-only model (.json or .npz) from the train directory.",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Increase output verbosity",
+    )
+
+    parser.add_argument(
+        "-s",
+        "--data-source",
+        default="influxdb",
+        help="Source of the model variables samples. Supported values: influxdb, local (line protocol file\n\
+that is read as new lines are appended). By default is influxdb.",
+    )
+
+    parser.add_argument(
+        "-b",
+        "--bucket",
+        default=None,
+        help="InfluxDB bucket with the model variables samples (required with influxdb data source).",
+    )
+
+    parser.add_argument(
+        "-d",
+        "--data-file",
+        default=None,
+        help="Line protocol file with the model variables samples (required with local data source).",
+    )
+
+    parser.add_argument(
+        "--write-bucket",
+        default=None,
+        help="InfluxDB bucket where predicted power is written. By default is the bucket of the samples.",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="power_predicted.lp",
+        help="Line protocol file where predicted power is written with local data source.\n\
+By default is ./power_predicted.lp.",
+    )
+
+    parser.add_argument(
+        "-n",
+        "--name",
+        default=None,
+        help="Value of the model tag of predicted power. By default is the model file name without extension.",
+    )
+
+    parser.add_argument(
+        "--window",
+        default=DEFAULT_WINDOW,
+        help=f"Aggregation window of samples (Flux duration). Use the same window used to train the model.\n\
+By default is {DEFAULT_WINDOW}.",
+    )
+
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="Interval (s) between estimations. By default is the window.",
+    )
+
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=None,
+        help="Time (s) given to samples to arrive before estimating their window. By default is the window.",
+    )
+
+    parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=300,
+        help="Number of windows kept for each variable. By default is 300.",
+    )
+
+    parser.add_argument(
+        "--align-tolerance",
+        type=float,
+        default=0,
+        help="Maximum time (s) between aligned samples of different variables. By default is 0.",
+    )
+
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=None,
+        help="Time (s) after which estimation is stopped. By default it runs until interrupted.",
+    )
+
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=60,
+        help="Interval (s) between lag reports in the log. Use 0 to only report at exit. By default is 60.",
+    )
+
+    parser.add_argument(
+        "-l",
+        "--log-file",
+        default="stream.log",
+        help="File where logs are stored. By default is ./stream.log.",
+    )
+
+    return parser
+
+
+def create_plot_parser():
+    parser = argparse.ArgumentParser(
+        prog="powerseer plot",
+        description="Render plots saved with --no-plots from output directories (and their subdirectories, e.g. sweep \
+runs).",
+        formatter_class=RawTextHelpFormatter
+    )
+
+    parser.add_argument(
+        "outputs",
+        nargs="+",
+        help="Output directories with saved plots.",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Increase output verbosity",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes rendering plots. By default is the number of CPUs.",
+    )
+
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep saved plots after rendering them.",
+    )
+
+    parser.add_argument(
+        "--plot-points",
+        type=int,
+        default=None,
+        help="Maximum number of points of time series line plots (0 to plot all samples). By default is the value \
+used\nwhen plots were saved.",
+    )
+
+    parser.add_argument(
+        "-l",
+        "--log-file",
+        default="plot.log",
+        help="File where logs are stored. By default is ./plot.log.",
+    )
+
     return parser
 
 
@@ -88,24 +589,66 @@ def check_x_vars():
         exit(1)
 
 
+def freq_wo_interaction_terms_compatible(x_vars):
+    return set(x_vars) == {"freq", "user_load", "system_load"} or set(x_vars) == {"sumfreq", "user_load", "system_load"}
+
+
+# All supported methods that can be used with x_vars (custom method must be explicitly specified)
+def get_all_methods(x_vars):
+    return [method for method in config.supported_pred_methods if method != "custom"
+            and (method != "freqwointeractionterms" or freq_wo_interaction_terms_compatible(x_vars))]
+
+
 def check_prediction_method():
-    if config.prediction_method not in config.supported_pred_methods:
-        log(f"Prediction method ({config.prediction_method}) not supported", "ERR")
-        log(f"Supported methods: {config.supported_pred_methods}", "ERR")
-        exit(1)
+    for method in config.prediction_methods:
+        if method not in config.supported_pred_methods:
+            log(f"Prediction method ({method}) not supported", "ERR")
+            log(f"Supported methods: {config.supported_pred_methods}", "ERR")
+            exit(1)
 
-    if config.prediction_method == "freqwointeractionterms":
-        if set(config.x_vars) != {"freq", "user_load", "system_load"} \
-                and set(config.x_vars) != {"sumfreq", "user_load", "system_load"}:
-            log(f"Specified vars {config.x_vars} not compatible with prediction method ({config.prediction_method})", "ERR")
-            log(f"{config.prediction_method} can only be used with vars [freq || sumfreq, user_load, system_load]", "ERR")
+        if method == "freqwointeractionterms" and not freq_wo_interaction_terms_compatible(config.x_vars):
+            log(f"Specified vars {config.x_vars} not compatible with prediction method ({method})", "ERR")
+            log(f"{method} can only be used with vars [freq || sumfreq, user_load, system_load]", "ERR")
             exit(1)
 
+    if len(set(config.prediction_methods)) != len(config.prediction_methods):
+        log(f"Prediction methods list ({config.prediction_methods}) has duplicated methods", "ERR")
+        exit(1)
+
+
+def check_search():
+    if config.search_mode not in config.supported_search_modes:
+        log(f"Search mode ({config.search_mode}) not supported", "ERR")
+        log(f"Supported modes: {config.supported_search_modes}", "ERR")
+        exit(1)
+    if config.search_budget <= 0:
+        log(f"Search budget must be a positive number of fits (specified {config.search_budget})", "ERR")
+        exit(1)
+    if config.search_time is not None and config.search_time <= 0:
+        log(f"Search time must be a positive number of seconds (specified {config.search_time})", "ERR")
+        exit(1)
+
+
+def check_svr():
+    if config.svr_components <= 0 or config.svr_sample_budget <= 0:
+        log(f"SVR components ({config.svr_components}) and sample budget ({config.svr_sample_budget}) must be "
+            f"positive numbers", "ERR")
+        exit(1)
+
 
 def check_files():
     if not os.path.exists(config.train_ts_file):
         log(f"Specified non existent train timestamps file: {config.train_ts_file}", "ERR")
         exit(1)
+    if config.merge_stats_files is not None:
+        for method in config.prediction_methods:
+            if method not in ["polynomial", "freqwointeractionterms"]:
+                log(f"Least squares statistics can't be merged using prediction method ({method})", "ERR")
+                exit(1)
+        for file in config.merge_stats_files:
+            if not os.path.exists(file):
+                log(f"Specified non existent file in statistics files list: {file}", "ERR")
+                exit(1)
     if config.test_ts_files_list is not None:
         for file in config.test_ts_files_list:
             if not os.path.exists(file):
@@ -113,11 +656,104 @@ def check_files():
                 exit(1)
 
 
+def check_data_source():
+    if config.data_source not in config.supported_data_sources:
+        log(f"Data source ({config.data_source}) not supported", "ERR")
+        log(f"Supported sources: {config.supported_data_sources}", "ERR")
+        exit(1)
+    get_data_source().check()
+
+
+def check_window():
+    if config.window != "auto":
+        try:
+            window = parse_duration(config.window)
+        except ValueError:
+            log(f"Window ({config.window}) must be a Flux duration (e.g. 2s, 1m) or 'auto'", "ERR")
+            exit(1)
+        if window <= 0:
+            log(f"Window must be a positive duration (specified {config.window})", "ERR")
+            exit(1)
+    if config.row_budget <= 0:
+        log(f"Row budget must be a positive number (specified {config.row_budget})", "ERR")
+        exit(1)
+
+
+def check_influxdb_client():
+    if config.influxdb_timeout <= 0:
+        log(f"InfluxDB timeout must be a positive number of seconds (specified {config.influxdb_timeout})", "ERR")
+        exit(1)
+    if config.influxdb_pool_size <= 0:
+        log(f"InfluxDB connection pool size must be a positive number (specified {config.influxdb_pool_size})", "ERR")
+        exit(1)
+
+
+def check_fetch_backend():
+    if config.fetch_backend not in config.supported_fetch_backends:
+        log(f"Fetch backend ({config.fetch_backend}) not supported", "ERR")
+        log(f"Supported backends: {config.supported_fetch_backends}", "ERR")
+        exit(1)
+    if config.fetch_backend == "async" and not async_client_available():
+        log("Async fetch backend requires aiohttp. Install it by running: pip install influxdb-client[async]", "ERR")
+        exit(1)
+    if config.fetch_concurrency is not None and config.fetch_concurrency <= 0:
+        log(f"Fetch concurrency must be a positive number (specified {config.fetch_concurrency})", "ERR")
+        exit(1)
+
+
+def check_coalesce():
+    if config.coalesce_gap is not None and (config.coalesce_gap < 0 or config.coalesce_span <= 0):
+        log(f"Coalesce gap ({config.coalesce_gap}) must be a non-negative number of seconds and coalesce span "
+            f"({config.coalesce_span}) a positive number of seconds", "ERR")
+        exit(1)
+
+
+def check_align_tolerance():
+    if config.align_tolerance < 0:
+        log(f"Alignment tolerance must be a non-negative number of seconds (specified {config.align_tolerance})", "ERR")
+        exit(1)
+
+
+def check_results_format():
+    if config.results_format not in config.supported_results_formats:
+        log(f"Results format ({config.results_format}) not supported", "ERR")
+        log(f"Supported formats: {config.supported_results_formats}", "ERR")
+        exit(1)
+
+
+def check_plot_workers():
+    if config.plot_workers is not None and config.plot_workers < 0:
+        log(f"Number of plot workers must be a non-negative number (specified {config.plot_workers})", "ERR")
+        exit(1)
+    if config.plot_points != 0 and config.plot_points < MIN_PLOT_POINTS:
+        log(f"Line plots points must be 0 or at least {MIN_PLOT_POINTS} (specified {config.plot_points})", "ERR")
+        exit(1)
+    if config.plot_density_points < 0:
+        log(f"Density plots points must be a non-negative number (specified {config.plot_density_points})", "ERR")
+        exit(1)
+
+
+def check_cache():
+    if config.cache_max_size <= 0:
+        log(f"Cache size must be a positive number of MB (specified {config.cache_max_size})", "ERR")
+        exit(1)
+
+
 def check_config():
     check_x_vars()
     check_prediction_method()
+    check_search()
+    check_svr()
     check_files()
-    check_bucket_exists(config.influxdb_bucket)
+    check_window()
+    check_influxdb_client()
+    check_fetch_backend()
+    check_coalesce()
+    check_align_tolerance()
+    check_plot_workers()
+    check_results_format()
+    check_cache()
+    check_data_source()
 
 
 def update_config(args):
@@ -126,12 +762,55 @@ def update_config(args):
     config.influxdb_bucket = args.bucket
     config.train_ts_file = args.train_timestamps
     config.test_ts_files_list = args.actual_timestamps_list.split(',') if args.actual_timestamps_list is not None else None
+    config.plots = not args.no_plots
+    config.plot_workers = args.plot_workers
+    config.plot_points = args.plot_points
+    config.plot_density_points = args.plot_density_points
     config.x_vars = args.vars.split(',')
-    config.prediction_method = args.prediction_method
+    config.prediction_methods = get_all_methods(config.x_vars) if args.prediction_method == "all" \
+        else args.prediction_method.split(',')
+    config.prediction_method = config.prediction_methods[0]
+    config.search_mode = args.search_mode
+    config.search_budget = args.search_budget
+    config.search_time = args.search_time
+    config.svr_components = args.svr_components
+    config.svr_sample_budget = args.svr_sample_budget
+    config.merge_stats_files = args.merge_stats.split(',') if args.merge_stats is not None else None
     config.output_dir = args.output
+    config.results_format = args.results_format
     config.train_dir = f'{args.output}/train'
     config.test_dir = f'{args.output}/test'
     config.log_file = f'{args.output}/cpu_power_model.log'
+    config.data_source = args.source
+    config.data_dir = args.data_dir
+    config.window = args.window
+    config.row_budget = args.row_budget
+    config.influxdb_timeout = args.influxdb_timeout
+    config.influxdb_pool_size = args.influxdb_pool_size
+    config.fetch_backend = args.fetch_backend
+    config.fetch_concurrency = args.fetch_concurrency
+    config.coalesce_gap = args.coalesce_gap
+    config.coalesce_span = args.coalesce_span
+    config.align_tolerance = args.align_tolerance
+    config.cache_dir = args.cache_dir
+    config.cache_max_size = args.cache_size
+    if args.no_cache:
+        config.cache_mode = "bypass"
+    elif args.refresh_cache:
+        config.cache_mode = "refresh"
+    else:
+        config.cache_mode = "use"
     os.makedirs(config.output_dir, exist_ok=True)
     os.makedirs(config.train_dir, exist_ok=True)
     os.makedirs(config.test_dir, exist_ok=True)
+
+
+# Set method of the model being trained or tested. When several methods are used each one has its own
+# train and test directories
+def set_prediction_method(method):
+    config.prediction_method = method
+    if len(config.prediction_methods) > 1:
+        config.train_dir = f'{config.output_dir}/{method}/train'
+        config.test_dir = f'{config.output_dir}/{method}/test'
+        os.makedirs(config.train_dir, exist_ok=True)
+        os.makedirs(config.test_dir, exist_ok=True)
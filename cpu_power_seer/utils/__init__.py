@@ -3,3 +3,7 @@ from . import parse_arguments
 from . import plot_train_data
 from . import test_model
 from . import train_model
+from . import sweep
+from . import serve
+from . import stream
+from . import render_plots
@@ -1,6 +1,6 @@
 from cpu_power_seer.config import config
 from cpu_power_seer.data.process.timestamps import parse_timestamps
-from cpu_power_seer.data.process.time_series import get_time_series
+from cpu_power_seer.data.process.time_series import get_time_series, resolve_window
 from cpu_power_seer.logs.logger import log
 
 
@@ -8,6 +8,7 @@ def run():
 
     log(f"Parsing train timestamps from {config.train_ts_file}")
     train_timestamps = parse_timestamps(config.train_ts_file)
+    resolve_window(train_timestamps)
 
     log("Getting temperature time series from corresponding period")
     temp_series = get_time_series(["temp"], train_timestamps, include_idle=True)
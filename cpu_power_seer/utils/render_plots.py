@@ -0,0 +1,54 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from cpu_power_seer.config import config
+from cpu_power_seer.logs.logger import log
+from cpu_power_seer.parser.my_parser import create_plot_parser
+from cpu_power_seer.data.plot.jobs import get_saved_plot_jobs, render_saved_plot_job
+from cpu_power_seer.data.plot.downsample import MIN_POINTS as MIN_PLOT_POINTS
+
+
+# powerseer plot: render plots saved with --no-plots from output directories
+def run(argv):
+    start = time.time()
+    args = create_plot_parser().parse_args(argv)
+    config.log_file = args.log_file
+    config.verbose = args.verbose
+    if args.workers is not None and args.workers <= 0:
+        log(f"Number of workers must be a positive number (specified {args.workers})", "ERR")
+        exit(1)
+    settings = {}
+    if args.plot_points is not None:
+        if args.plot_points != 0 and args.plot_points < MIN_PLOT_POINTS:
+            log(f"Line plots points must be 0 or at least {MIN_PLOT_POINTS} (specified {args.plot_points})", "ERR")
+            exit(1)
+        settings["plot_points"] = args.plot_points
+
+    jobs = []
+    for output in args.outputs:
+        if not os.path.isdir(output):
+            log(f"Specified non existent output directory: {output}", "ERR")
+            exit(1)
+        jobs += get_saved_plot_jobs(output)
+    if not jobs:
+        log(f"There aren't saved plots in {args.outputs}", "WARN")
+        return
+
+    log(f"Rendering {len(jobs)} plots using {args.workers or os.cpu_count()} workers")
+    with ProcessPoolExecutor(max_workers=min(len(jobs), args.workers or os.cpu_count()),
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(render_saved_plot_job, output_dir, file, settings) for output_dir, file in jobs]
+        render_time = 0
+        for (output_dir, file), future in zip(jobs, futures):
+            render_time += future.result()
+            if config.verbose:
+                log(f"Rendered {file}")
+            if not args.keep:
+                os.remove(file)
+                if not os.listdir(os.path.dirname(file)):
+                    os.rmdir(os.path.dirname(file))
+
+    log(f"PLOT RENDERING TIME: {render_time} ({len(jobs)} plots)")
+    log(f"TOTAL EXECUTION TIME: {time.time() - start}")
@@ -0,0 +1,202 @@
+import os
+import json
+import stat
+import time
+import signal
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cpu_power_seer.config import config
+from cpu_power_seer.logs.logger import log
+from cpu_power_seer.parser.my_parser import create_serve_parser
+from cpu_power_seer.inference import load_model, load_linear_model
+from cpu_power_seer.inference.inputs import get_var_values
+from cpu_power_seer.inference.batcher import MicroBatcher
+
+LINEAR_MODEL_EXTENSIONS = (".json", ".npz")
+
+# Maximum size (bytes) of request bodies
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def parse_model_arg(model_arg):
+    name, _, path = model_arg.rpartition("=")
+    return name or os.path.splitext(os.path.basename(path))[0], path
+
+
+def load_served_model(path):
+    if not os.path.exists(path):
+        log(f"Specified non existent model: {path}", "ERR")
+        exit(1)
+    try:
+        if path.endswith(LINEAR_MODEL_EXTENSIONS):
+            return load_linear_model(path)
+        return load_model(path)
+    except (ValueError, KeyError, OSError) as e:
+        log(f"Model {path} can't be loaded: {e}", "ERR")
+        exit(1)
+
+
+# Identity (device and inode) of a Unix socket file, None if path doesn't exist or isn't a socket
+def get_socket_id(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_dev, st.st_ino) if stat.S_ISSOCK(st.st_mode) else None
+
+
+def get_models_stats(batchers):
+    return {name: batcher.stats.get_summary() for name, batcher in batchers.items()}
+
+
+def log_stats(batchers):
+    for name, stats in get_models_stats(batchers).items():
+        latencies = " ".join(f"{key[:-3]}={stats[key]:.3f}ms" for key in ["p50_ms", "p90_ms", "p99_ms", "max_ms"]
+                             if key in stats)
+        log(f"Model {name}: {stats['requests']} requests, {stats['samples']} samples, {stats['batches']} batches "
+            f"(mean batch size {stats['mean_batch_size']:.1f}). Latency: {latencies or '-'}")
+
+
+# HTTP API:
+#   GET /models: served models with their vars
+#   GET /stats: requests, batches and latency percentiles of each model
+#   POST /predict/<NAME> (or /predict if there is only one model): JSON body with "samples", either a list of
+#   samples (values in model vars order) or an object with a list of values per var. Returns predicted "power"
+def create_handler(batchers):
+
+    class PredictionHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send_json(self, status, content):
+            body = json.dumps(content).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/models":
+                self.send_json(200, {name: {"vars": batcher.model.x_vars, "method": batcher.model.method}
+                                     for name, batcher in batchers.items()})
+            elif self.path == "/stats":
+                self.send_json(200, get_models_stats(batchers))
+            else:
+                self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+        # Request body, None if its length is invalid or too large (the connection is closed, since the body
+        # isn't read)
+        def read_body(self):
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.close_connection = True
+                self.send_json(400, {"error": f"Invalid Content-Length: {self.headers.get('Content-Length')}"})
+                return None
+            if length > MAX_BODY_SIZE:
+                self.close_connection = True
+                self.send_json(413, {"error": f"Request body is larger than {MAX_BODY_SIZE} bytes"})
+                return None
+            return self.rfile.read(length)
+
+        def do_POST(self):
+            body = self.read_body()
+            if body is None:
+                return
+            path = self.path.rstrip("/")
+            if path == "/predict" and len(batchers) == 1:
+                name = next(iter(batchers))
+            elif path.startswith("/predict/"):
+                name = path[len("/predict/"):]
+            else:
+                self.send_json(404, {"error": f"Unknown path {self.path}"})
+                return
+            if name not in batchers:
+                self.send_json(404, {"error": f"Unknown model {name}. Served models: {list(batchers)}"})
+                return
+            batcher = batchers[name]
+            try:
+                X = get_var_values(batcher.model.x_vars, json.loads(body)["samples"])
+            except (ValueError, KeyError, TypeError) as e:
+                self.send_json(400, {"error": f"Invalid request: {e!r}"})
+                return
+            try:
+                y = batcher.predict(X)
+            except Exception as e:
+                self.send_json(500, {"error": f"Prediction failed: {e!r}"})
+                return
+            self.send_json(200, {"model": name, "power": y.tolist()})
+
+        def log_message(self, format, *args):
+            if config.verbose:
+                log(f"{self.command} {self.path}: {format % args}", print_log=False)
+
+    return PredictionHandler
+
+
+def report_stats(batchers, interval, stop_event):
+    while not stop_event.wait(interval):
+        log_stats(batchers)
+
+
+# powerseer serve: load models once and serve predictions until SIGINT/SIGTERM
+def run(argv):
+    args = create_serve_parser().parse_args(argv)
+    config.log_file = args.log_file
+    config.verbose = args.verbose
+
+    batchers = {}
+    for model_arg in args.models:
+        name, path = parse_model_arg(model_arg)
+        if name in batchers:
+            log(f"Model name {name} is used by more than one model. Use NAME=PATH to set different names", "ERR")
+            exit(1)
+        start = time.time()
+        model = load_served_model(path)
+        batchers[name] = MicroBatcher(model, args.max_batch, args.max_delay / 1000)
+        log(f"Model {name} loaded from {path} in {(time.time() - start) * 1000:.1f} ms (vars: {model.x_vars})")
+
+    handler = create_handler(batchers)
+    socket_id = None
+    if args.socket is not None:
+        # Only stale sockets are replaced, other files are never removed
+        if os.path.lexists(args.socket):
+            if get_socket_id(args.socket) is None:
+                log(f"Socket path {args.socket} already exists and isn't a socket", "ERR")
+                exit(1)
+            os.remove(args.socket)
+        server = ThreadingUnixHTTPServer(args.socket, handler)
+        socket_id = get_socket_id(args.socket)
+        address = f"unix:{args.socket}"
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), handler)
+        server.daemon_threads = True
+        address = f"http://{args.host}:{server.server_address[1]}"
+
+    stop_event = threading.Event()
+    if args.stats_interval > 0:
+        threading.Thread(target=report_stats, args=(batchers, args.stats_interval, stop_event), daemon=True).start()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    log(f"Serving {len(batchers)} models at {address} (max batch: {args.max_batch} samples, "
+        f"max delay: {args.max_delay} ms)")
+    try:
+        server.serve_forever()
+    finally:
+        stop_event.set()
+        server.server_close()
+        # Only the socket created by this server is removed
+        if socket_id is not None and get_socket_id(args.socket) == socket_id:
+            os.remove(args.socket)
+        for batcher in batchers.values():
+            batcher.stop()
+        log_stats(batchers)
+        log("Server stopped")
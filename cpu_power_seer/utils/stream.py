@@ -0,0 +1,249 @@
+import os
+import re
+import time
+import signal
+import threading
+import numpy as np
+import pandas as pd
+
+from cpu_power_seer.config import config
+from cpu_power_seer.logs.logger import log
+from cpu_power_seer.parser.my_parser import create_stream_parser
+from cpu_power_seer.influxdb.influxdb import write_influxdb, check_bucket_exists, close_client, InfluxDBQueryError
+from cpu_power_seer.influxdb.influxdb_queries import parse_duration, var_query, get_time_shift
+from cpu_power_seer.datasource.influxdb_source import InfluxDBSource
+from cpu_power_seer.datasource.tail_source import TailSource
+from cpu_power_seer.data.process.ring_buffer import RingBuffer
+from cpu_power_seer.data.process.alignment import align_vars, log_alignment_stats
+from cpu_power_seer.inference.batcher import LatencyStats
+from cpu_power_seer.utils.serve import load_served_model
+
+PREDICTION_MEASUREMENT = "power_predicted"
+TAG_ESCAPE_RE = re.compile(r'([,= ])')
+
+
+def format_date(time_ns):
+    return pd.Timestamp(time_ns, tz="UTC").strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+# Line protocol records of predicted power: power_predicted,model=<NAME> value=<POWER> <TIME>
+def format_records(model_name, times, power):
+    tag = TAG_ESCAPE_RE.sub(r'\\\1', model_name)
+    return [f"{PREDICTION_MEASUREMENT},model={tag} value={value} {time}"
+            for time, value in zip(times.tolist(), power.tolist())]
+
+
+class LineProtocolWriter:
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, records):
+        try:
+            with open(self.path, 'a') as f:
+                f.write("".join(f"{record}\n" for record in records))
+        except OSError as e:
+            log(f"Unexpected error while writing {len(records)} records to {self.path}: {e}", "WARN")
+            return False
+        return True
+
+
+class InfluxDBWriter:
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def write(self, records):
+        return write_influxdb(records, self.bucket)
+
+
+# Estimate power of the newest complete windows. On each step, vars are queried from the last estimated
+# window (query range is aligned to the aggregation window) and stored in a ring buffer
+# per var, replacing previous values of the same windows. Samples of all vars are aligned, predicted with a
+# single model.predict call and written in a single batch. Lag is measured from the end of each window to
+# the write of its prediction
+class StreamEstimator:
+
+    def __init__(self, model, model_name, source, writer, window, buffer_size, delay_ns, tolerance_ns):
+        self.model = model
+        self.model_name = model_name
+        self.source = source
+        self.writer = writer
+        self.window = window
+        self.window_ns = int(parse_duration(window) * 1e9)
+        self.delay_ns = delay_ns
+        self.tolerance_ns = tolerance_ns
+        self.buffers = {var: RingBuffer(buffer_size) for var in model.x_vars}
+        # Load windows are labeled (time shifted) before their samples, so they are complete later
+        self.max_shift_ns = int(max(get_time_shift(var, parse_duration(window)) for var in model.x_vars) * 1e9)
+        self.lookback_ns = buffer_size * self.window_ns
+        self.last_time = None
+        self.lag_stats = LatencyStats()
+        self.failed_samples = 0
+
+    # Query range (start, stop) and time of the newest complete window (ready). Load windows are shifted
+    # back and the last one before the shifted stop also aggregates the following window (like Flux
+    # aggregateWindow truncated at range stop), so it isn't complete. The window before the first
+    # new window is queried again to get samples of shifted loads
+    def get_query_range(self, now_ns):
+        stop = (now_ns - self.delay_ns) // self.window_ns * self.window_ns
+        ready = stop - self.max_shift_ns - (self.window_ns if self.max_shift_ns > 0 else 0)
+        last_time = self.last_time if self.last_time is not None else ready - self.window_ns
+        start = max(last_time, ready - self.lookback_ns) - self.window_ns
+        return start // self.window_ns * self.window_ns, stop, ready
+
+    def update_buffers(self, df):
+        if df.empty:
+            return
+        times = pd.DatetimeIndex(pd.to_datetime(df["_time"], utc=True)).as_unit("ns").asi8
+        for var, buffer in self.buffers.items():
+            if var in df.columns:
+                values = df[var].to_numpy(dtype=np.float64)
+                present = ~np.isnan(values)
+                buffer.extend(times[present], values[present])
+
+    # Aligned samples of all vars after the last estimated window and until ready (ns)
+    def get_new_samples(self, ready):
+        series = {}
+        for var, buffer in self.buffers.items():
+            times, values = buffer.get()
+            series[var] = pd.Series(values, index=times)
+        exp_data = pd.DataFrame(series).rename_axis("time").reset_index()
+        first = self.last_time + 1 if self.last_time is not None else ready
+        times = exp_data["time"].to_numpy()
+        exp_data = exp_data[(times >= first - self.tolerance_ns) & (times <= ready + self.tolerance_ns)]
+        exp_data = exp_data.assign(time=pd.to_datetime(exp_data["time"], utc=True))
+        valid = {var: np.ones(len(exp_data), dtype=bool) for var in self.model.x_vars}
+        samples = align_vars(exp_data, self.model.x_vars, valid, self.tolerance_ns)
+        times = pd.DatetimeIndex(samples["time"]).as_unit("ns").asi8
+        keep = (times >= first) & (times <= ready)
+        return times[keep], samples[self.model.x_vars].to_numpy()[keep]
+
+    # Failed queries and writes are retried on the next step (windows not written are estimated again while
+    # they are in the buffers)
+    def step(self, now_ns):
+        start, stop, ready = self.get_query_range(now_ns)
+        try:
+            exp_data = self.source.query_vars(self.model.x_vars, format_date(start), format_date(stop), self.window)
+        except (InfluxDBQueryError, OSError) as e:
+            log(f"{e}. Retrying on next interval", "WARN")
+            return 0
+        self.update_buffers(exp_data)
+        times, X = self.get_new_samples(ready)
+        if len(times) == 0:
+            return 0
+        power = self.model.predict(X)
+        if not self.writer.write(format_records(self.model_name, times, power)):
+            self.failed_samples += len(times)
+            log(f"{len(times)} estimated samples couldn't be written. Retrying on next interval", "WARN")
+            if self.last_time is None:
+                self.last_time = int(times[0]) - self.window_ns
+            return 0
+        self.lag_stats.record_batch(((time.time_ns() - times) / 1e9).tolist(), len(times))
+        self.last_time = int(times[-1])
+        if config.verbose:
+            log(f"Estimated {len(times)} samples from {format_date(times[0])} to {format_date(times[-1])}")
+        return len(times)
+
+
+def log_lag_stats(estimator):
+    stats = estimator.lag_stats.get_summary()
+    lags = " ".join(f"{key[:-3]}={stats[key] / 1000:.2f}s" for key in ["p50_ms", "p90_ms", "p99_ms", "max_ms"]
+                    if key in stats)
+    log(f"Estimated {stats['samples']} samples in {stats['batches']} batched writes "
+        f"({estimator.failed_samples} sample writes failed). Lag: {lags or '-'}")
+
+
+def report_stats(estimator, interval, stop_event):
+    while not stop_event.wait(interval):
+        log_lag_stats(estimator)
+
+
+def check_stream_args(args):
+    if args.data_source not in config.supported_data_sources:
+        log(f"Data source ({args.data_source}) not supported. Supported data sources: "
+            f"{config.supported_data_sources}", "ERR")
+        exit(1)
+    if args.data_source == "influxdb" and args.bucket is None:
+        log("InfluxDB data source requires a bucket (-b)", "ERR")
+        exit(1)
+    if args.data_source == "local" and args.data_file is None:
+        log("Local data source requires a data file (-d)", "ERR")
+        exit(1)
+    try:
+        window = parse_duration(args.window)
+    except ValueError:
+        window = 0
+    if window <= 0:
+        log(f"Invalid window {args.window}. Use a positive Flux duration (e.g. 2s, 500ms, 1m)", "ERR")
+        exit(1)
+    if args.buffer_size <= 0 or (args.interval is not None and args.interval <= 0):
+        log("Stream buffer size and interval must be greater than 0", "ERR")
+        exit(1)
+    if args.delay is not None and args.delay < 0:
+        log("Stream delay must be a non-negative number of seconds", "ERR")
+        exit(1)
+    if args.align_tolerance < 0:
+        log("Alignment tolerance must be a non-negative number of seconds", "ERR")
+        exit(1)
+
+
+# powerseer stream: estimate power from live samples until SIGINT/SIGTERM (or --duration)
+def run(argv):
+    args = create_stream_parser().parse_args(argv)
+    config.log_file = args.log_file
+    config.verbose = args.verbose
+    check_stream_args(args)
+
+    model = load_served_model(args.model)
+    unsupported_vars = [var for var in model.x_vars if var not in var_query]
+    if unsupported_vars:
+        log(f"Model vars {unsupported_vars} can't be retrieved", "ERR")
+        exit(1)
+    model_name = args.name or os.path.splitext(os.path.basename(args.model))[0]
+    window = parse_duration(args.window)
+    interval = args.interval if args.interval is not None else window
+    delay = args.delay if args.delay is not None else window
+    max_shift = max(get_time_shift(var, window) for var in model.x_vars)
+
+    config.data_source = args.data_source
+    if args.data_source == "influxdb":
+        # Live periods are never cached
+        config.influxdb_bucket = args.bucket
+        config.cache_mode = "bypass"
+        source = InfluxDBSource()
+        source.check()
+        write_bucket = args.write_bucket or args.bucket
+        check_bucket_exists(write_bucket)
+        writer = InfluxDBWriter(write_bucket)
+        output = f"InfluxDB bucket {write_bucket}"
+    else:
+        source = TailSource(args.data_file, int(((args.buffer_size + 3) * window + max_shift + delay) * 1e9))
+        source.check()
+        writer = LineProtocolWriter(args.output)
+        output = args.output
+    estimator = StreamEstimator(model, model_name, source, writer, args.window, args.buffer_size,
+                                int(delay * 1e9), int(args.align_tolerance * 1e9))
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda signum, frame: stop_event.set())
+    if args.stats_interval > 0:
+        threading.Thread(target=report_stats, args=(estimator, args.stats_interval, stop_event), daemon=True).start()
+    log(f"Estimating power with model {model_name} (vars: {model.x_vars}) from {source.name} every {interval} s. "
+        f"Predictions written to {output}")
+
+    start = time.time()
+    while not stop_event.is_set():
+        step_start = time.time()
+        estimator.step(time.time_ns())
+        if args.duration is not None and time.time() - start >= args.duration:
+            break
+        stop_event.wait(max(interval - (time.time() - step_start), 0))
+
+    stop_event.set()
+    log_lag_stats(estimator)
+    log_alignment_stats()
+    if args.data_source == "influxdb":
+        close_client()
+    log("Stream stopped")
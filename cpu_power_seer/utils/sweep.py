@@ -0,0 +1,263 @@
+import os
+import glob
+import shutil
+import json
+import time
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+from cpu_power_seer.config import config
+from cpu_power_seer.config.print import print_config
+from cpu_power_seer.config.state import get_config_state, set_config_state
+from cpu_power_seer.logs.logger import log
+from cpu_power_seer.parser.my_parser import create_parser, create_sweep_parser, check_config, update_config, \
+    check_results_format
+from cpu_power_seer.data.process.timestamps import parse_timestamps
+from cpu_power_seer.data.process.time_series import get_time_series, get_idle_consumption, resolve_window
+from cpu_power_seer.datasource.sources import close_data_source
+from cpu_power_seer.data.process.alignment import log_alignment_stats
+from cpu_power_seer.data.model.utils import write_results_table
+from cpu_power_seer.data.plot.jobs import wait_plots, log_plot_stats
+from cpu_power_seer.utils import plot_train_data, train_model, test_model
+
+MANIFEST_RUN_KEYS = ["bucket", "name", "train_timestamps", "actual_timestamps", "output"]
+
+# Settings that change retrieved time series (besides bucket, timestamps file and vars)
+FETCH_SETTINGS = ["data_source", "data_dir", "window", "row_budget", "align_tolerance"]
+
+
+def read_manifest(file):
+    if not os.path.exists(file):
+        log(f"Specified non existent manifest: {file}", "ERR")
+        exit(1)
+    with open(file, 'r') as f:
+        if file.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                log("YAML manifests require PyYAML. Install it by running: pip install pyyaml", "ERR")
+                exit(1)
+            try:
+                return yaml.safe_load(f)
+            except (yaml.YAMLError, ValueError) as e:
+                log(f"Manifest {file} can't be parsed: {e}", "ERR")
+                exit(1)
+        try:
+            return json.load(f)
+        except ValueError as e:
+            log(f"Manifest {file} can't be parsed: {e}", "ERR")
+            exit(1)
+
+
+def check_manifest(manifest, file):
+    if not isinstance(manifest, dict) or not manifest.get("models") or "run" not in manifest:
+        log(f"Manifest {file} must define 'models' and 'run' sections", "ERR")
+        exit(1)
+    for key in ["train_timestamps", "output"]:
+        if key not in manifest["run"]:
+            log(f"Manifest {file} must define '{key}' in 'run' section", "ERR")
+            exit(1)
+    for model_name, model in manifest["models"].items():
+        if "vars" not in model or "method" not in model:
+            log(f"Model {model_name} from manifest {file} must define 'vars' and 'method'", "ERR")
+            exit(1)
+
+
+# Combinations of matrix values. Each matrix entry is a list of values (bound to the entry name) or of
+# dicts (merged into the combination)
+def get_combinations(matrix):
+    entries = []
+    for name, values in matrix.items():
+        entries.append([value if isinstance(value, dict) else {name: value} for value in values])
+    for combination in itertools.product(*entries):
+        params = {}
+        for values in combination:
+            params.update(values)
+        yield params
+
+
+def get_options_args(options):
+    args = []
+    for option, value in options.items():
+        if value is True:
+            args.append(f"--{option}")
+        elif value is not None and value is not False:
+            args += [f"--{option}", str(value)]
+    return args
+
+
+# One powerseer command line arguments per model and matrix combination. Run templates are formatted with
+# the model name ("model") and the combination values
+def get_runs_args(manifest, verbose):
+    runs = []
+    for model_name, model in manifest["models"].items():
+        for params in get_combinations(manifest.get("matrix", {})):
+            params = {"model": model_name, **params}
+            run = {key: manifest["run"][key].format(**params) for key in MANIFEST_RUN_KEYS if key in manifest["run"]}
+            args = ["--vars", model["vars"], "-p", model["method"], "-t", run["train_timestamps"],
+                    "-o", run["output"]]
+            if "bucket" in run:
+                args += ["-b", run["bucket"]]
+            if "name" in run:
+                args += ["-n", run["name"]]
+            test_files = sorted(glob.glob(run["actual_timestamps"])) if "actual_timestamps" in run else []
+            if test_files:
+                args += ["-a", ",".join(test_files)]
+            args += get_options_args({**manifest.get("options", {}), **model.get("options", {})})
+            if verbose:
+                args.append("-v")
+            runs.append(args)
+    return runs
+
+
+def get_fetch_key(file):
+    return (config.influxdb_bucket, file, tuple(config.x_vars)) + tuple(getattr(config, s) for s in FETCH_SETTINGS)
+
+
+# Retrieve train and test data of every run. Runs with the same bucket, timestamps file, vars and fetch
+# settings share the same data, which is only retrieved once
+def fetch_runs_data(runs_states):
+    train_data = {}
+    tests_data = {}
+    runs_data = []
+    source_key = None
+    for state in runs_states:
+        set_config_state(state)
+        if source_key != (config.data_source, config.data_dir):
+            close_data_source()
+            source_key = (config.data_source, config.data_dir)
+
+        train_key = get_fetch_key(config.train_ts_file)
+        train_timestamps = parse_timestamps(config.train_ts_file)
+        resolve_window(train_timestamps)
+        if train_key not in train_data:
+            log(f"Getting train data from {config.train_ts_file} (bucket: {config.influxdb_bucket}, vars: {config.x_vars})")
+            temp_series = get_time_series(["temp"], train_timestamps, include_idle=True)
+            time_series = get_time_series(config.x_vars + ["power"], train_timestamps)
+            train_data[train_key] = (train_timestamps, temp_series, time_series, get_idle_consumption(train_timestamps))
+
+        run_tests_data = None
+        if config.test_ts_files_list is not None:
+            # Test files not retrieved yet by other runs are retrieved at once
+            files = [file for file in dict.fromkeys(config.test_ts_files_list) if get_fetch_key(file) not in tests_data]
+            if files:
+                log(f"Getting test data from {files} (bucket: {config.influxdb_bucket}, vars: {config.x_vars})")
+                for file, test_data in zip(files, test_model.get_tests_data(files)):
+                    tests_data[get_fetch_key(file)] = test_data
+            run_tests_data = [tests_data[get_fetch_key(file)] for file in config.test_ts_files_list]
+        runs_data.append((train_data[train_key], run_tests_data))
+    log(f"Retrieved {len(train_data)} train and {len(tests_data)} test time series for {len(runs_states)} runs")
+    return runs_data
+
+
+# Plot, train and test models of a run from already retrieved data (executed by worker processes)
+def run_models(state, train_data, tests_data, search_jobs):
+    set_config_state(state)
+    # Runs are already executed in parallel, so each run renders its plots with one background worker unless specified
+    if config.plot_workers is None:
+        config.plot_workers = 1
+    # and hyperparameter searches of all runs share the CPUs
+    if config.search_jobs is None:
+        config.search_jobs = search_jobs
+    train_timestamps, temp_series, time_series, idle_consumption = train_data
+    plot_train_data.run(temp_series, time_series)
+    models = train_model.run(train_timestamps, time_series, idle_consumption)
+    results = test_model.run(models, tests_data)
+    log_plot_stats(wait_plots())
+    return results
+
+
+# Sweep results table (results tables of all runs) and summary of results with all threads
+def write_summary(runs_states, runs_results, sweep_dir):
+    tables = [results.assign(OUTPUT=state["output_dir"], VARS=",".join(state["x_vars"]))
+              for state, results in zip(runs_states, runs_results) if results is not None]
+    if not tables:
+        log("There aren't results of any run", "WARN")
+        return
+    results = pd.concat(tables, ignore_index=True)
+    results = results[["OUTPUT", "VARS"] + [column for column in results.columns if column not in ["OUTPUT", "VARS"]]]
+    write_results_table(results, f"{sweep_dir}/sweep-results")
+
+    table = results[results["THREADS"] == 0].drop(columns=["THREADS", "SAMPLES", "TRAIN TIME"]).to_string(index=False)
+    summary_file = f"{sweep_dir}/sweep-summary.out"
+    with open(summary_file, 'w') as file:
+        file.write(f"{table}\n")
+    log(f"Sweep summary stored at {summary_file}\n{table}")
+
+
+# Runs output directories must be empty, so results (e.g. appended summaries) of previous sweeps aren't mixed
+# with the new ones. Their contents are removed when force is true
+def prepare_output_dirs(output_dirs, force):
+    not_empty = [d for d in dict.fromkeys(output_dirs) if os.path.isdir(d) and os.listdir(d)]
+    if not_empty and not force:
+        log(f"Runs output directories {not_empty} aren't empty. Remove them or use --force to overwrite them", "ERR")
+        exit(1)
+    for output_dir in not_empty:
+        log(f"Removing previous contents of {output_dir}", "WARN")
+        shutil.rmtree(output_dir)
+
+
+# powerseer sweep: run every model and matrix combination from a manifest. Data is retrieved once per unique
+# (bucket, timestamps file, vars) and runs are trained and tested in a pool of worker processes
+def run(argv):
+    start = time.time()
+    args = create_sweep_parser().parse_args(argv)
+    # Messages are only printed until the sweep directory (from the manifest) is known
+    config.log_file = os.devnull
+    config.verbose = args.verbose
+    manifest = read_manifest(args.manifest)
+    check_manifest(manifest, args.manifest)
+    sweep_dir = manifest.get("sweep_dir", "sweep")
+    workers = args.workers or manifest.get("workers") or os.cpu_count()
+    parser = create_parser()
+    runs_args = [parser.parse_args(run_args) for run_args in get_runs_args(manifest, args.verbose)]
+    prepare_output_dirs([run_args.output for run_args in runs_args], args.force)
+    os.makedirs(sweep_dir, exist_ok=True)
+    config.log_file = f"{sweep_dir}/sweep.log"
+    config.results_format = args.results_format
+    check_results_format()
+
+    # Check every run configuration before retrieving any data
+    runs_states = []
+    for run_args in runs_args:
+        close_data_source()
+        update_config(run_args)
+        check_config()
+        print_config()
+        runs_states.append(get_config_state())
+    config.log_file = f"{sweep_dir}/sweep.log"
+    log(f"Sweep from {args.manifest}: {len(runs_states)} runs using {workers} workers")
+
+    start_fetch = time.time()
+    runs_data = fetch_runs_data(runs_states)
+    close_data_source()
+    end_fetch = time.time()
+
+    runs_results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(run_models, state, train_data, tests_data, train_model.get_cpu_share(workers))
+                   for state, (train_data, tests_data) in zip(runs_states, runs_data)]
+        for state, future in zip(runs_states, futures):
+            # Runs exiting on errors (exit(1) raises SystemExit in the worker) fail alone, while interrupts
+            # (e.g. Ctrl-C) stop the sweep and cancel pending runs
+            try:
+                runs_results.append(future.result())
+            except KeyboardInterrupt:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            except (Exception, SystemExit) as e:
+                runs_results.append(None)
+                config.log_file = f"{sweep_dir}/sweep.log"
+                log(f"Run with output {state['output_dir']} has failed: {e!r}. Check {state['log_file']}", "ERR")
+
+    config.log_file = f"{sweep_dir}/sweep.log"
+    # Runs configurations may use other results formats
+    config.results_format = args.results_format
+    write_summary(runs_states, runs_results, sweep_dir)
+    log(f"SWEEP DATA GATHERING EXECUTION TIME: {end_fetch - start_fetch}")
+    log(f"SWEEP TOTAL EXECUTION TIME: {time.time() - start}")
+    log_alignment_stats()
+    if any(results is None for results in runs_results):
+        exit(1)
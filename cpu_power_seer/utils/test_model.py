@@ -1,14 +1,18 @@
 import os
 import re
+import numpy as np
 import pandas as pd
 
 from cpu_power_seer.config import config
 from cpu_power_seer.logs.logger import log
 from cpu_power_seer.data.process.timestamps import get_timestamp_from_line, get_threads_timestamps
-from cpu_power_seer.data.process.time_series import get_time_series, fix_time_units
+from cpu_power_seer.data.process.time_series import get_periods_time_series, set_time_diff, fix_time_units
 from cpu_power_seer.data.process.model_vars import get_formatted_vars
-from cpu_power_seer.data.plot.time_series import plot_time_series, plot_model, plot_results
-from cpu_power_seer.data.model.utils import write_performance
+from cpu_power_seer.data.process.accumulator import ColumnarAccumulator
+from cpu_power_seer.data.plot.jobs import submit_plot
+from cpu_power_seer.data.model.metrics import get_grouped_metrics
+from cpu_power_seer.data.model.utils import write_results, write_results_table, write_comparison, write_value
+from cpu_power_seer.parser.my_parser import set_prediction_method
 
 
 def get_test_name(file):
@@ -17,13 +21,6 @@ def get_test_name(file):
     return occurrences[-1]
 
 
-def get_test_data(start_line, stop_line, initial_date):
-    test_timestamps = get_timestamp_from_line(start_line, stop_line, 0)
-    time_series = get_time_series(config.x_vars + ["power"], test_timestamps, initial_date=initial_date)
-    return time_series
-    # plot_time_series("Test Time Series", test_time_series, config.x_vars, f'{config.model_name}-test-data.png')
-
-
 def set_test_output(test_name, threads):
     config.test_results_dir = f'{config.test_dir}/{test_name}/{threads}' if threads != 0 \
         else f'{config.test_dir}/{test_name}'
@@ -32,64 +29,164 @@ def set_test_output(test_name, threads):
     os.makedirs(config.img_dir, exist_ok=True)
 
 
-def update_test_model_values(model, time_series):
-    X_actual, y_actual = get_formatted_vars(config.x_vars, time_series)
-    model.set_actual_values(X_actual, y_actual)
-
-
-def save_model_results(model, threads, test_name, test_time_series=None):
-    expected = model.y_actual if model.y_actual is not None else model.y_test
-    predicted = model.y_pred_actual if model.y_pred_actual is not None else model.y_pred
-    plot_results(expected, predicted, f'{config.model_name}-results.png')
-
-    # If writing test results with all threads write R2 and MAPE also to summary files
-    write_performance(model.name, expected, predicted,
-                      equation=model.equation, write_summary=(threads == 0), test_name=test_name)
+# Test periods of an actual timestamps file: (test name, [(threads, period)])
+def get_file_periods(file):
+    threads_periods = [(threads, get_timestamp_from_line(start_line, stop_line, 0)[0])
+                       for threads, start_line, stop_line in get_threads_timestamps(file)]
+    return get_test_name(file), threads_periods
+
+
+# Test time series from the time series of its periods: (test name, [(threads, time series)], time series
+# of all threads). time_diff is computed from the beginning of the test
+def get_test_data(test_name, threads_list, periods_time_series):
+    test_time_series = ColumnarAccumulator(config.x_vars + ["power", "time", "time_diff", "time_unit"])
+    threads_time_series = []
+    initial_date = None
+    prev_time_unit = None
+    for threads, time_series_threads in zip(threads_list, periods_time_series):
+        set_time_diff(time_series_threads, "time", initial_date)
+        current_time_unit = time_series_threads["time_unit"].iloc[0]
+        if initial_date is None:
+            prev_time_unit = current_time_unit
+            initial_date = time_series_threads["time"].min()
+        if current_time_unit != prev_time_unit:
+            test_time_series = fix_time_units(test_time_series, current_time_unit, prev_time_unit)
+            prev_time_unit = current_time_unit
+        threads_time_series.append((threads, time_series_threads))
+        test_time_series.append(time_series_threads)
+    return test_name, threads_time_series, test_time_series.to_frame()
+
+
+# Test data of actual timestamps files (by default, config.test_ts_files_list). Periods of all files and
+# threads are retrieved at once, so retrieval takes as long as the slowest query
+def get_tests_data(files=None):
+    files = files if files is not None else config.test_ts_files_list
+    tests_periods = [get_file_periods(file) for file in files]
+    periods = [period for _, threads_periods in tests_periods for _, period in threads_periods]
+    periods_time_series = get_periods_time_series(config.x_vars + ["power"], periods)
+
+    tests_data = []
+    start = 0
+    for test_name, threads_periods in tests_periods:
+        end = start + len(threads_periods)
+        tests_data.append(get_test_data(test_name, [threads for threads, _ in threads_periods],
+                                        periods_time_series[start:end]))
+        start = end
+    return tests_data
+
+
+# Predict all tests and threads time series with a single predict call. Returns the expected and predicted
+# values of each test and threads: [(test name, [(threads, expected, predicted)], expected, predicted)]
+def predict_tests(model, tests_data):
+    formatted_vars = [get_formatted_vars(config.x_vars, time_series)
+                      for _, threads_time_series, _ in tests_data for _, time_series in threads_time_series]
+    X = np.concatenate([X for X, _ in formatted_vars])
+    y = np.concatenate([y for _, y in formatted_vars])
+    model.set_actual_values(X, y)
+    model.predict_actual_values()
+
+    offsets = np.cumsum([0] + [len(X) for X, _ in formatted_vars])
+    tests_predictions = []
+    i = 0
+    for test_name, threads_time_series, _ in tests_data:
+        threads_predictions = [(threads, model.y_actual[offsets[i + j]:offsets[i + j + 1]],
+                                model.y_pred_actual[offsets[i + j]:offsets[i + j + 1]])
+                               for j, (threads, _) in enumerate(threads_time_series)]
+        test_start, test_end = offsets[i], offsets[i + len(threads_time_series)]
+        tests_predictions.append((test_name, threads_predictions, model.y_actual[test_start:test_end],
+                                  model.y_pred_actual[test_start:test_end]))
+        i += len(threads_time_series)
+    return tests_predictions
+
+
+# Save metrics of a test and submit its plots
+def save_test_results(model, performance, test_name, threads, expected, predicted, time_series):
+    set_test_output(test_name, threads)
+    write_results(model.name, performance, equation=model.equation)
+    submit_plot("results", np.array(expected), np.array(predicted), f'{config.model_name}-results.png')
 
     # If actual test data is provided plot predicted time series
-    if test_time_series is not None:
-        test_time_series['power_predicted'] = model.y_pred_actual.flatten()
-        plot_time_series("Predicted Time Series", test_time_series,
-                         config.x_vars, f'{config.model_name}-predictions.png', show_predictions=True)
-
-
-def run_test(model, threads, test_name, time_series):
-    set_test_output(test_name, threads)
-    update_test_model_values(model, time_series)
-    model.test()
-    save_model_results(model, threads, test_name, time_series)
-    # If not specific threads benchmark execution
-    if threads == 0:
-        # If model dimension is 2 it is represented as a polynomial function
-        if len(config.x_vars) == 1 and config.prediction_method != "perceptron":
-            plot_model(model, config.x_vars[0], f'{config.model_name}-function.png')
-
-
-def run(model):
-    if config.test_ts_files_list is not None:
-        for file in config.test_ts_files_list:
-            test_name = get_test_name(file)
-            threads_timestamps = get_threads_timestamps(file)
-            test_time_series = pd.DataFrame(columns=config.x_vars.copy() + ["power"] + ["time_diff"] + ["time_unit"])
-            first = True
-            initial_date = None
-            prev_time_unit = None
-            for t in threads_timestamps:
-                time_series_threads = get_test_data(t[1], t[2], initial_date)
-                current_time_unit = time_series_threads["time_unit"].iloc[0]
-                if first:
-                    prev_time_unit = current_time_unit
-                    initial_date = time_series_threads["time"].min()
-                    first = False
-                if current_time_unit != prev_time_unit:
-                    test_time_series = fix_time_units(test_time_series, current_time_unit, prev_time_unit)
-                    prev_time_unit = current_time_unit
-                run_test(model, t[0], test_name, time_series_threads)
-                log(f"Model has been evaluated using {test_name} with {t[0]} threads."
+    if time_series is not None:
+        submit_plot("time_series", "Predicted Time Series",
+                    time_series.assign(power_predicted=np.ravel(predicted)), config.x_vars,
+                    f'{config.model_name}-predictions.png', show_predictions=True)
+
+
+# Model function (test values of its var sorted and their predictions)
+def get_model_function(model):
+    X_not_squared_position = 0
+    if hasattr(model, 'poly_features') and model.poly_features is not None:
+        X_not_squared_position = 1
+
+    X_idx = model.X_test[:, X_not_squared_position].argsort()
+    X_test = model.X_test
+    if hasattr(model, 'scaler') and model.scaler is not None:
+        X_test = model.scaler.inverse_transform(X_test)
+    return X_test[X_idx][:, X_not_squared_position], model.y_pred[X_idx].ravel()
+
+
+# Results to save for a model: (test name, threads, expected, predicted, time series) for every test and
+# threads (threads = 0 for all threads) or for the test split if there aren't actual values
+def get_test_jobs(model, tests_data):
+    # Models trained in worker processes already have their test split predictions
+    if model.y_pred is None:
+        model.predict_test_values()
+    if tests_data is None:
+        return [("test_split", 0, model.y_test, model.y_pred, None)]
+
+    jobs = []
+    for (test_name, threads_predictions, expected, predicted), (_, threads_time_series, test_time_series) \
+            in zip(predict_tests(model, tests_data), tests_data):
+        # Results of repeated threads are stored in the same directory, so only the last ones are saved
+        last_index = {threads: i for i, (threads, _, _) in enumerate(threads_predictions)}
+        for i, (threads, threads_expected, threads_predicted) in enumerate(threads_predictions):
+            if last_index[threads] == i:
+                jobs.append((test_name, threads, threads_expected, threads_predicted, threads_time_series[i][1]))
+        jobs.append((test_name, 0, expected, predicted, test_time_series))
+    return jobs
+
+
+# Metrics of all tests and threads of a model computed at once (one row per job)
+def get_jobs_performance(jobs):
+    sizes = [np.size(expected) for _, _, expected, _, _ in jobs]
+    expected = np.concatenate([np.ravel(expected) for _, _, expected, _, _ in jobs])
+    predicted = np.concatenate([np.ravel(predicted) for _, _, _, predicted, _ in jobs])
+    return get_grouped_metrics(expected, predicted, sizes).assign(SAMPLES=sizes)
+
+
+# Evaluate every model with every test (or test split if there aren't actual values). Test data is
+# retrieved once (unless it is already provided) and each model predicts all tests at once. Metrics of all
+# tests and threads of a model are computed together. Returns the results table: one row per method, test
+# and threads (0 for all threads)
+def run(models, tests_data=None):
+    if tests_data is None and config.test_ts_files_list is not None:
+        tests_data = get_tests_data()
+
+    rows = []
+    for method, model in models.items():
+        set_prediction_method(method)
+        jobs = get_test_jobs(model, tests_data)
+        performances = get_jobs_performance(jobs)
+        for job, (_, performance) in zip(jobs, performances.iterrows()):
+            test_name, threads = job[:2]
+            performance = performance.to_dict()
+            samples = int(performance.pop("SAMPLES"))
+            save_test_results(model, performance, *job)
+            summary_name = test_name if tests_data is not None else "Test Split"
+            rows.append({"METHOD": method, "TEST": summary_name, "THREADS": threads, "SAMPLES": samples,
+                         "TRAIN TIME": model.train_time, **performance})
+            if threads != 0:
+                log(f"Model has been evaluated using {test_name} with {threads} threads."
                     f" Results stored at {config.test_results_dir}")
-                test_time_series = pd.concat([test_time_series, time_series_threads], ignore_index=True)
-            run_test(model, 0, test_name, test_time_series)
-    else:
-        set_test_output("test_split", 0)
-        model.test()
-        save_model_results(model, 0, "Test Split")
+                continue
+            write_value("R2", performance["R2 SCORE"], summary_name)
+            write_value("MAPE", performance["MAPE"], summary_name)
+            # If model dimension is 2 it is represented as a polynomial function
+            if tests_data is not None and len(config.x_vars) == 1 and config.prediction_method != "perceptron":
+                submit_plot("model", *get_model_function(model), config.x_vars[0], f'{config.model_name}-function.png')
+
+    results = pd.DataFrame(rows)
+    write_results_table(results, f'{config.output_dir}/{config.model_name}-results')
+    if len(models) > 1:
+        write_comparison(results)
+    return results
@@ -1,30 +1,121 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 from cpu_power_seer.config import config
+from cpu_power_seer.config.state import get_config_state, set_config_state
 from cpu_power_seer.data.process.time_series import get_idle_consumption
 from cpu_power_seer.data.process.model_vars import get_formatted_vars
+from cpu_power_seer.data.process.shared_arrays import share_array, attach_array
 from cpu_power_seer.data.model import *
+from cpu_power_seer.logs.logger import log
+from cpu_power_seer.parser.my_parser import set_prediction_method
 
 
-def run(train_timestamps, time_series):
+def create_model(method):
     model = None
-    if config.prediction_method == "polynomial":
+    if method == "polynomial":
         model = PolynomialModel(config.model_name)
-    elif config.prediction_method == "freqwointeractionterms":
+    elif method == "freqwointeractionterms":
         model = FreqWoInteractionTerms(config.model_name)
-    elif config.prediction_method == "perceptron":
+    elif method == "perceptron":
         model = PerceptronModel(config.model_name)
-    elif config.prediction_method == "svr":
+    elif method == "svr":
         model = SVRModel(config.model_name)
-    elif config.prediction_method == "custom":
+    elif method == "svrnystroem":
+        model = ApproximateSVRModel(config.model_name, "nystroem")
+    elif method == "svrsketch":
+        model = ApproximateSVRModel(config.model_name, "sketch")
+    elif method == "svrsubsample":
+        model = SubsampledSVRModel(config.model_name)
+    elif method == "custom":
         model = CustomModel(config.model_name)
+    return model
 
-    idle_consumption = get_idle_consumption(train_timestamps)
-    X, y = get_formatted_vars(config.x_vars, time_series)
+
+def train(method, X, y, idle_consumption):
+    start = time.time()
+    set_prediction_method(method)
+    model = create_model(method)
 
     model.set_train_and_test_data(X, y)
     model.set_model()
     model.train()
     model.set_equation(idle_consumption)
 
-    model.save_model(f"{config.train_dir}/{config.prediction_method}.joblib")
+    model.save_model(f"{config.train_dir}/{method}.joblib")
+    model.train_time = time.time() - start
+    log(f"Model {method} has been trained in {model.train_time:.2f} s. Model stored at {config.train_dir}")
+
+    return model
+
+
+# CPUs of each of the given number of processes running in parallel (e.g. for their hyperparameter searches)
+def get_cpu_share(processes):
+    return max(1, os.cpu_count() // processes)
+
+
+# Models are trained in parallel, so their hyperparameter searches share the CPUs
+def init_worker(config_state, search_jobs):
+    set_config_state(config_state)
+    if config.search_jobs is None:
+        config.search_jobs = search_jobs
 
+
+# Train a model in a worker process from X and y shared by the main process. Only the estimator, its test
+# split predictions, equation and training time are sent back (not the training data)
+def train_shared(method, X_spec, y_spec, idle_consumption):
+    X_shm, X = attach_array(X_spec)
+    y_shm, y = attach_array(y_spec)
+    try:
+        model = train(method, X, y, idle_consumption)
+        model.predict_test_values()
+        return model.model, model.y_pred, model.equation, model.train_time
+    finally:
+        del X, y
+        X_shm.close()
+        y_shm.close()
+
+
+# Model trained in a worker process. Its test split is taken again from X and y (the split is deterministic)
+def attach_trained_model(method, X, y, trained):
+    set_prediction_method(method)
+    model = create_model(method)
+    model.set_train_and_test_data(X, y)
+    model.X_train, model.y_train = None, None
+    model.model, model.y_pred, model.equation, model.train_time = trained
     return model
+
+
+# Train each method in its own process. X and y are shared with workers through shared memory
+def train_parallel(X, y, idle_consumption):
+    methods = config.prediction_methods
+    workers = min(len(methods), os.cpu_count())
+    X_shm, X_spec = share_array(X)
+    y_shm, y_spec = share_array(y)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=init_worker,
+                                 initargs=(get_config_state(), get_cpu_share(workers))) as executor:
+            futures = {method: executor.submit(train_shared, method, X_spec, y_spec, idle_consumption)
+                       for method in methods}
+            return {method: attach_trained_model(method, X, y, future.result())
+                    for method, future in futures.items()}
+    finally:
+        for shm in (X_shm, y_shm):
+            shm.close()
+            shm.unlink()
+
+
+# Train every prediction method with the same time series. Returns trained models by method
+def run(train_timestamps, time_series, idle_consumption=None):
+    if idle_consumption is None:
+        idle_consumption = get_idle_consumption(train_timestamps)
+    X, y = get_formatted_vars(config.x_vars, time_series)
+
+    if len(config.prediction_methods) == 1:
+        method = config.prediction_methods[0]
+        return {method: train(method, X, y, idle_consumption)}
+    log(f"Training {len(config.prediction_methods)} models in parallel: {config.prediction_methods}")
+    return train_parallel(X, y, idle_consumption)
@@ -12,12 +12,17 @@ setup(
         'urllib3',
         'influxdb-client',
         'pandas',
+        'pyarrow',
         'numpy',
         'scikit-learn',
         'matplotlib',
         'seaborn',
         'termcolor',
     ],
+    extras_require={
+        'async': ['influxdb-client[async]'],
+        'yaml': ['pyyaml'],
+    },
     entry_points={
         'console_scripts': [
             'powerseer = cpu_power_seer.main:main',